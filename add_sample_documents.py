@@ -39,25 +39,28 @@ async def add_sample_documents():
         print("📚 Agregando documentos de muestra...")
         print("=" * 50)
         
-        for i, doc in enumerate(sample_documents, 1):
-            print(f"\n📄 Documento {i}: {doc['content'][:50]}...")
+        # Un solo request: el backend genera los embeddings en batch y hace bulk insert
+        try:
+            response = await client.post(
+                f"{base_url}/documents/batch",
+                json={"documents": sample_documents},
+                timeout=60.0
+            )
             
-            try:
-                response = await client.post(
-                    f"{base_url}/documents",
-                    json=doc,
-                    timeout=10.0
-                )
+            if response.status_code == 200:
+                result = response.json()
+                print(f"✅ {result['created']} documentos agregados, {result['failed']} con error")
+                for item in result["results"]:
+                    doc = sample_documents[item["index"]]
+                    if item["status"] == "created":
+                        print(f"   📄 {doc['content'][:50]}... → ID: {item.get('id', 'N/A')}")
+                    else:
+                        print(f"   ❌ {doc['content'][:50]}... → {item.get('error')}")
+            else:
+                print(f"❌ Error {response.status_code}: {response.text}")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"✅ Documento agregado exitosamente")
-                    print(f"   ID: {result.get('document', {}).get('id', 'N/A')}")
-                else:
-                    print(f"❌ Error {response.status_code}: {response.text}")
-                    
-            except Exception as e:
-                print(f"❌ Error agregando documento: {e}")
+        except Exception as e:
+            print(f"❌ Error agregando documentos: {e}")
         
         print(f"\n🔍 Verificando documentos en la base de datos...")
         try:
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga: RPS y latencias p50/p95/p99 por endpoint
+
+Contra un backend ya arrancado:
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --requests 200 --concurrency 16
+
+Reproducible de punta a punta (arranca mock_upstreams + el backend apuntando al mock):
+    python -m benchmarks.load_test --spawn --scenarios chat,auto-tools,documents --json baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.mock_upstreams import upstream_env
+
+ASSISTANT_ID = "bench"
+QUESTIONS = [
+    "Què és l'Acord d'Associació?",
+    "Quins sectors tenen períodes transitoris?",
+    "Com afecta l'acord a la lliure circulació de mercaderies?",
+    "Quin temps fa a Andorra la Vella?"
+]
+
+
+def chat_payload(i: int) -> Dict[str, Any]:
+    # Cada request es distinta para no medir los caches (semantic / embeddings / respuestas)
+    return {
+        "messages": [{"role": "user", "content": f"{QUESTIONS[i % len(QUESTIONS)]} (#{i})"}],
+        "assistant_id": ASSISTANT_ID,
+        "vector_limit": 5
+    }
+
+
+def auto_tools_payload(i: int) -> Dict[str, Any]:
+    return {**chat_payload(i), "tool_names": ["get_current_weather"]}
+
+
+def document_payload(i: int) -> Dict[str, Any]:
+    return {
+        "content": f"Document de benchmark {i}. " + " ".join(QUESTIONS) * 4,
+        "metadata": {"assistantId": ASSISTANT_ID, "source": "benchmark"}
+    }
+
+
+# nombre → (método, ruta, payload por índice, streaming)
+SCENARIOS: Dict[str, tuple] = {
+    "chat": ("POST", "/chat", chat_payload, False),
+    "chat-stream": ("POST", "/chat/stream", chat_payload, True),
+    "auto-tools": ("POST", "/chat/auto-tools", auto_tools_payload, False),
+    "auto-tools-stream": ("POST", "/chat/auto-tools/stream", auto_tools_payload, True),
+    "documents": ("POST", "/documents", document_payload, False),
+    "documents-list": ("GET", "/documents", None, False)
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def timed_request(client: httpx.AsyncClient, method: str, path: str,
+                        payload: Optional[Dict[str, Any]], stream: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    first_byte = None
+    try:
+        if stream:
+            async with client.stream(method, path, json=payload) as response:
+                failed = response.status_code >= 400
+                async for line in response.aiter_lines():
+                    if first_byte is None and line.startswith("event: token"):
+                        first_byte = time.perf_counter() - started
+                    failed = failed or line.startswith("event: error")
+        else:
+            response = await client.request(method, path, json=payload)
+            failed = response.status_code >= 400
+    except httpx.HTTPError:
+        failed = True
+    return {"latency": time.perf_counter() - started, "ttft": first_byte, "failed": failed}
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, total: int, concurrency: int,
+                       warmup: int = 0) -> Dict[str, Any]:
+    method, path, build_payload, stream = SCENARIOS[name]
+    path = f"{path}?limit=10" if method == "GET" else path
+    # Offset por escenario: las preguntas no se repiten entre escenarios
+    offset = list(SCENARIOS).index(name) * 1_000_000 + int(time.time()) % 100_000 * 10
+
+    async def one(i: int) -> Dict[str, Any]:
+        payload = build_payload(offset + i) if build_payload else None
+        return await timed_request(client, method, path, payload, stream)
+
+    for i in range(warmup):
+        await one(total + i)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    results: List[Dict[str, Any]] = []
+
+    async def worker():
+        while not queue.empty():
+            results.append(await one(queue.get_nowait()))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(r["latency"] for r in results if not r["failed"])
+    ttfts = sorted(r["ttft"] for r in results if not r["failed"] and r["ttft"] is not None)
+    report = {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": sum(1 for r in results if r["failed"]),
+        "elapsed_seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    }
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        value = percentile(latencies, fraction)
+        report[f"{label}_ms"] = round(value * 1000, 1) if value is not None else None
+    if stream:
+        value = percentile(ttfts, 0.50)
+        report["ttft_p50_ms"] = round(value * 1000, 1) if value is not None else None
+    return report
+
+
+def print_report(reports: List[Dict[str, Any]]):
+    print(f"\n{'scenario':<20}{'conc':>6}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ttft p50':>10}")
+    for r in reports:
+        cells = [r["p50_ms"], r["p95_ms"], r["p99_ms"], r.get("ttft_p50_ms")]
+        p50, p95, p99, ttft = ("-" if value is None else value for value in cells)
+        print(f"{r['scenario']:<20}{r['concurrency']:>6}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9}"
+              f"{p50:>10}{p95:>10}{p99:>10}{ttft:>10}")
+
+
+async def wait_until_healthy(url: str, timeout: float = 30.0, path: str = "/health"):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(path)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become healthy within {timeout}s")
+
+
+def spawn_stack(app_port: int, mock_port: int, mock_args: List[str]) -> List[subprocess.Popen]:
+    """
+    Start mock_upstreams and the backend (uvicorn main:app) pointed at it
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    env = {
+        **os.environ,
+        **upstream_env(mock_url),
+        "OPENROUTER_HTTP2": "false",
+        "EMBEDDING_CACHE_PATH": "",
+        "SESSION_STORE_BACKEND": "memory",
+        "MERITXELL_SESSION_DB": os.path.join(cache_dir, "meritxell_sessions.sqlite3")
+    }
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_upstreams", "--port", str(mock_port), *mock_args],
+        cwd=root, env=env
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL
+    )
+    return [mock, app]
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    reports = []
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        for name in args.scenarios:
+            print(f"🏁 {name}: {args.requests} requests, concurrency {args.concurrency}")
+            reports.append(await run_scenario(client, name, args.requests, args.concurrency, args.warmup))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test de /chat, /chat/auto-tools y /documents")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default="chat,auto-tools,documents",
+                        help=f"Lista separada por comas: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="Requests por escenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5, help="Requests secuenciales no medidos")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", help="Guarda el informe en este fichero (baseline para comparar)")
+    parser.add_argument("--spawn", action="store_true", help="Arranca mock_upstreams y el backend localmente")
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--mock-args", default="", help="Argumentos extra para mock_upstreams (ej: \"--llm-latency 0.1\")")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    processes = []
+    if args.spawn:
+        app_port = httpx.URL(args.url).port or 8000
+        processes = spawn_stack(app_port, args.mock_port, args.mock_args.split())
+    try:
+        if processes:
+            asyncio.run(wait_until_healthy(f"http://127.0.0.1:{args.mock_port}", path="/weather/v1/current.json"))
+            asyncio.run(wait_until_healthy(args.url))
+        reports = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump({"created_at": time.time(), "url": args.url, "reports": reports}, handle, indent=2)
+        print(f"\n💾 Informe guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Stand-ins locales de los upstreams para benchmarks (un solo servidor, sin red externa)
+
+Rutas (apuntar el backend aquí con las variables que imprime ``--print-env``):
+    /openrouter/chat/completions   OpenRouter (latencia, streaming SSE y tool_calls)
+    /openai/v1/embeddings          OpenAI embeddings (vectores deterministas por texto)
+    /weather/v1/current.json       WeatherAPI
+    /rest/v1/...                   PostgREST de Supabase: tabla documents + RPCs match_documents*
+
+Uso:
+    python -m benchmarks.mock_upstreams --port 9100 --llm-latency 0.3 --token-delay 0.005
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EMBEDDING_DIMENSIONS = 1536
+ANSWER_WORDS = (
+    "L'Acord d'Associació estableix el marc de cooperació econòmica i permet l'accés "
+    "progressiu al mercat interior amb períodes transitoris per als sectors més sensibles"
+).split()
+
+
+class MockSettings:
+    def __init__(self, llm_latency: float = 0.3, token_delay: float = 0.005, completion_tokens: int = 60,
+                 tool_call_rate: float = 1.0, embedding_latency: float = 0.05, weather_latency: float = 0.1,
+                 db_latency: float = 0.02, seed_documents: int = 200, assistant_id: str = "bench",
+                 max_documents: int = 10000):
+        self.llm_latency = llm_latency
+        self.token_delay = token_delay
+        self.completion_tokens = completion_tokens
+        self.tool_call_rate = tool_call_rate
+        self.embedding_latency = embedding_latency
+        self.weather_latency = weather_latency
+        self.db_latency = db_latency
+        self.seed_documents = seed_documents
+        self.assistant_id = assistant_id
+        self.max_documents = max_documents
+
+
+def fake_embedding(text: str) -> List[float]:
+    """
+    Deterministic unit vector derived from the text hash
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+def answer_tokens(count: int) -> List[str]:
+    return [ANSWER_WORDS[i % len(ANSWER_WORDS)] + " " for i in range(count)]
+
+
+def fake_arguments(tool: Dict[str, Any], messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Arguments for the tool's required parameters, filled from its JSON schema
+    """
+    last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    parameters = tool.get("function", {}).get("parameters") or {}
+    properties = parameters.get("properties") or {}
+    arguments = {}
+    for name in parameters.get("required") or list(properties)[:1]:
+        kind = (properties.get(name) or {}).get("type", "string")
+        if kind in ("integer", "number"):
+            arguments[name] = 3
+        elif kind == "boolean":
+            arguments[name] = True
+        else:
+            arguments[name] = "Andorra la Vella" if "location" in name else last_user[:200]
+    return arguments
+
+
+def wants_tool_call(payload: Dict[str, Any], settings: MockSettings) -> bool:
+    if not payload.get("tools") or payload.get("tool_choice") == "none":
+        return False
+    # Un solo round de tools por pregunta: si ya hay resultados después del último user, responder
+    for message in reversed(payload.get("messages") or []):
+        if message.get("role") == "tool":
+            return False
+        if message.get("role") == "user":
+            break
+    return random.random() < settings.tool_call_rate
+
+
+def create_app(settings: MockSettings) -> FastAPI:
+    app = FastAPI(title="Mock upstreams")
+    documents: List[Dict[str, Any]] = []
+    next_id = 1
+
+    def add_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        nonlocal next_id
+        inserted = []
+        for row in rows:
+            row = {**row, "id": next_id}
+            next_id += 1
+            documents.append(row)
+            inserted.append(row)
+        del documents[:max(len(documents) - settings.max_documents, 0)]
+        return inserted
+
+    add_rows([
+        {
+            "content": f"Document de prova {i}: " + "".join(answer_tokens(40)),
+            "metadata": {"assistantId": settings.assistant_id, "source": "seed"},
+            "embedding": fake_embedding(f"seed {i}")
+        }
+        for i in range(settings.seed_documents)
+    ])
+
+    def assistant_of(doc: Dict[str, Any]) -> Optional[str]:
+        return (doc.get("metadata") or {}).get("assistantId") or doc.get("assistant_id")
+
+    # --- OpenRouter ---
+    @app.post("/openrouter/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        created = int(time.time())
+        tool_call = None
+        if wants_tool_call(payload, settings):
+            tool = payload["tools"][0]
+            tool_call = {
+                "id": f"call_{random.getrandbits(48):012x}",
+                "type": "function",
+                "function": {
+                    "name": tool["function"]["name"],
+                    "arguments": json.dumps(fake_arguments(tool, payload["messages"]))
+                }
+            }
+        tokens = [] if tool_call else answer_tokens(settings.completion_tokens)
+        finish_reason = "tool_calls" if tool_call else "stop"
+
+        if not payload.get("stream"):
+            await asyncio.sleep(settings.llm_latency + settings.token_delay * len(tokens))
+            message = {"role": "assistant", "content": "".join(tokens)}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            return {
+                "id": f"gen-{created}",
+                "object": "chat.completion",
+                "created": created,
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": len(tokens), "total_tokens": 100 + len(tokens)}
+            }
+
+        async def events():
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+                body = {"id": f"gen-{created}", "object": "chat.completion.chunk", "created": created,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                return f"data: {json.dumps(body)}\n\n"
+
+            yield ": OPENROUTER PROCESSING\n\n"
+            await asyncio.sleep(settings.llm_latency)
+            if tool_call:
+                yield chunk({"tool_calls": [{"index": 0, "id": tool_call["id"], "type": "function",
+                                             "function": {"name": tool_call["function"]["name"], "arguments": ""}}]})
+                yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": tool_call["function"]["arguments"]}}]})
+            for token in tokens:
+                yield chunk({"content": token})
+                if settings.token_delay:
+                    await asyncio.sleep(settings.token_delay)
+            yield chunk({}, finish_reason)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # --- OpenAI embeddings ---
+    @app.post("/openai/v1/embeddings")
+    async def embeddings(request: Request):
+        payload = await request.json()
+        inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        await asyncio.sleep(settings.embedding_latency)
+        tokens = sum(len(str(text).split()) for text in inputs)
+        return {
+            "object": "list",
+            "model": payload.get("model"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(str(text))}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    # --- WeatherAPI ---
+    @app.get("/weather/v1/current.json")
+    async def current_weather(q: str = "Andorra la Vella"):
+        await asyncio.sleep(settings.weather_latency)
+        return {
+            "location": {"name": q, "country": "Andorra"},
+            "current": {
+                "temp_c": 18.0,
+                "condition": {"text": "Partly cloudy"},
+                "humidity": 55,
+                "wind_kph": 9.4,
+                "feelslike_c": 17.2
+            }
+        }
+
+    # --- PostgREST (Supabase) ---
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        payload = await request.json()
+        await asyncio.sleep(settings.db_latency)
+        if function not in ("match_documents", "match_documents_text"):
+            return []
+        assistant_id = (payload.get("filter") or {}).get("assistantId")
+        matches = [doc for doc in documents if not assistant_id or assistant_of(doc) == assistant_id]
+        return [
+            {"id": doc["id"], "content": doc["content"], "metadata": doc.get("metadata") or {},
+             "similarity": round(0.9 - 0.01 * rank, 4)}
+            for rank, doc in enumerate(matches[:payload.get("match_count", 5)])
+        ]
+
+    @app.get("/rest/v1/{table}")
+    async def select_rows(table: str, request: Request):
+        await asyncio.sleep(settings.db_latency)
+        params = request.query_params
+        rows = documents
+        for key, value in params.items():
+            operator, _, operand = value.partition(".")
+            if key == "metadata->>assistantId" and operator == "eq":
+                rows = [doc for doc in rows if (doc.get("metadata") or {}).get("assistantId") == operand]
+            elif key == "assistant_id" and operator == "eq":
+                rows = [doc for doc in rows if doc.get("assistant_id") == operand]
+            elif key == "id" and operator in ("eq", "gt"):
+                bound = int(operand)
+                rows = [doc for doc in rows if doc["id"] == bound or (operator == "gt" and doc["id"] > bound)]
+        return rows[:int(params.get("limit", len(rows)))]
+
+    @app.post("/rest/v1/{table}")
+    async def insert_rows(table: str, request: Request):
+        payload = await request.json()
+        await asyncio.sleep(settings.db_latency)
+        rows = add_rows(payload if isinstance(payload, list) else [payload])
+        return JSONResponse(rows, status_code=201)
+
+    return app
+
+
+def upstream_env(base_url: str) -> Dict[str, str]:
+    """
+    Environment that points the backend at this mock server
+    """
+    return {
+        "SUPABASE_URL": base_url,
+        "SUPABASE_KEY": "bench.bench.bench",  # supabase-py solo valida el formato JWT
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": f"{base_url}/openrouter",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{base_url}/openai/v1",
+        "WEATHER_API_KEY": "bench",
+        "WEATHER_API_BASE_URL": f"{base_url}/weather"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock local de OpenRouter, OpenAI embeddings, WeatherAPI y PostgREST")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Segundos hasta el primer token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Segundos entre tokens")
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--tool-call-rate", type=float, default=1.0, help="Probabilidad de tool_calls si hay tools")
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--weather-latency", type=float, default=0.1)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    parser.add_argument("--seed-documents", type=int, default=200)
+    parser.add_argument("--print-env", action="store_true", help="Imprime las variables para el backend y sale")
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}"
+    if args.print_env:
+        for key, value in upstream_env(base_url).items():
+            print(f"{key}={value}")
+        return
+
+    settings = MockSettings(
+        llm_latency=args.llm_latency,
+        token_delay=args.token_delay,
+        completion_tokens=args.completion_tokens,
+        tool_call_rate=args.tool_call_rate,
+        embedding_latency=args.embedding_latency,
+        weather_latency=args.weather_latency,
+        db_latency=args.db_latency,
+        seed_documents=args.seed_documents
+    )
+    print(f"🧪 Mock upstreams en {base_url}")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
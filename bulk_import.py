@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Importación masiva de documentos desde JSONL / NDJSON al vector store
+
+Cada línea es un registro ``{"content": "...", "metadata": {...}}``. El fichero
+se lee en streaming (memoria acotada): un productor llena una cola limitada
+(backpressure) y varios workers trocean, embeben e insertan batches con
+``vector_store.insert_documents``. Tras cada batch confirmado se guarda un
+checkpoint para poder reanudar.
+
+Uso:
+    python bulk_import.py corpus.jsonl [--resume] [--batch-size 100] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from chunking import count_tokens
+from config import Config
+from structured_logging import setup_logging, stop_logging
+from supabase_client import vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class ImportStats:
+    def __init__(self, start_position: int = 0):
+        self.started_at = time.monotonic()
+        self.documents = 0
+        self.created = 0
+        self.failed = 0
+        self.tokens = 0
+        self.checkpoint = start_position
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "documents": self.documents,
+            "created": self.created,
+            "failed": self.failed,
+            "tokens": self.tokens,
+            "elapsed_seconds": round(elapsed, 3),
+            "docs_per_second": round(self.documents / elapsed, 2),
+            "tokens_per_second": round(self.tokens / elapsed, 2),
+            "checkpoint": self.checkpoint
+        }
+
+
+def line_too_long(max_line_bytes: int) -> ValueError:
+    return ValueError(f"record exceeds INGEST_MAX_LINE_BYTES ({max_line_bytes} bytes)")
+
+
+def parse_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Parse one JSONL line; returns None for blank lines, raises ValueError for invalid records
+    """
+    line = line.strip()
+    if not line:
+        return None
+    record = json.loads(line)
+    if not isinstance(record, dict) or not isinstance(record.get("content"), str):
+        raise ValueError("record must be an object with a string 'content'")
+    return {"content": record["content"], "metadata": record.get("metadata") or {}}
+
+
+async def iter_jsonl_file(path: str, offset: int = 0, read_lines: int = 1000,
+                          max_line_bytes: int = None) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Stream records from a JSONL file starting at a byte offset
+
+    Yields ``(end_offset, record)``; ``record`` is an Exception for invalid lines
+    (including lines longer than ``max_line_bytes``, which are skipped without being
+    held in memory). Lines are read in blocks on a worker thread so the event loop
+    never blocks on disk.
+    """
+    max_line_bytes = max_line_bytes or Config.INGEST_MAX_LINE_BYTES
+
+    def read_block(handle) -> List[Tuple[int, Optional[bytes]]]:
+        block = []
+        for _ in range(read_lines):
+            line = handle.readline(max_line_bytes + 1)
+            if not line:
+                break
+            if len(line) > max_line_bytes and not line.endswith(b"\n"):
+                # Descartar el resto de la línea por trozos
+                while line and not line.endswith(b"\n"):
+                    line = handle.readline(max_line_bytes)
+                line = None
+            block.append((handle.tell(), line))
+        return block
+
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        while True:
+            block = await asyncio.to_thread(read_block, handle)
+            if not block:
+                return
+            for end_offset, line in block:
+                try:
+                    record = parse_record(line) if line is not None else line_too_long(max_line_bytes)
+                except ValueError as e:
+                    record = e
+                if record is not None:
+                    yield end_offset, record
+
+
+async def iter_jsonl_stream(chunks: AsyncIterator[bytes], skip: int = 0,
+                            max_line_bytes: int = None) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Stream records from an NDJSON byte stream (e.g. an HTTP request body)
+
+    Yields ``(record_number, record)``; the first ``skip`` records are dropped (resume).
+    A line longer than ``max_line_bytes`` is reported as an invalid record and its
+    remaining bytes are discarded up to the next newline, so memory stays bounded.
+    """
+    max_line_bytes = max_line_bytes or Config.INGEST_MAX_LINE_BYTES
+    buffer = b""
+    number = 0
+    discarding = False  # dentro de una línea demasiado larga: se descarta hasta el próximo "\n"
+
+    def emit(line: bytes):
+        nonlocal number
+        try:
+            record = parse_record(line) if len(line) <= max_line_bytes else line_too_long(max_line_bytes)
+        except ValueError as e:
+            record = e
+        if record is None:
+            return None
+        number += 1
+        return None if number <= skip else (number, record)
+
+    async for chunk in chunks:
+        if discarding:
+            newline = chunk.find(b"\n")
+            if newline < 0:
+                continue
+            chunk, discarding = chunk[newline + 1:], False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            item = emit(line)
+            if item:
+                yield item
+        if len(buffer) > max_line_bytes:
+            buffer, discarding = b"", True
+            number += 1
+            if number > skip:
+                yield number, line_too_long(max_line_bytes)
+    if buffer:
+        item = emit(buffer)
+        if item:
+            yield item
+
+
+async def import_records(
+    records: AsyncIterator[Tuple[int, Any]],
+    batch_size: int = None,
+    concurrency: int = None,
+    start_position: int = 0,
+    on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run the bounded pipeline: records → batches → (embedding + bulk insert) workers
+
+    The queue holds at most ``concurrency`` pending batches, so reading pauses when
+    the workers fall behind. The checkpoint only advances over contiguous batches whose
+    documents were all created, so a resume never skips unimported records.
+    """
+    batch_size = batch_size or Config.INGEST_BATCH_SIZE
+    concurrency = concurrency or Config.INGEST_MAX_CONCURRENCY
+    stats = ImportStats(start_position)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    completed: Dict[int, int] = {}
+    next_sequence = 0
+    # Primer batch con errores: el checkpoint nunca lo pasará, los posteriores no se guardan
+    blocked_at: Optional[int] = None
+
+    def advance_checkpoint():
+        nonlocal next_sequence
+        while next_sequence in completed:
+            stats.checkpoint = completed.pop(next_sequence)
+            next_sequence += 1
+        if on_checkpoint:
+            on_checkpoint(stats.to_dict())
+
+    def block_checkpoint(sequence: int):
+        # Los batches posteriores ya completados no se necesitarán: liberar su entrada
+        nonlocal blocked_at
+        if blocked_at is None or sequence < blocked_at:
+            blocked_at = sequence
+            for done in [s for s in completed if s > sequence]:
+                del completed[done]
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                return
+            sequence, position, batch, invalid = item
+            try:
+                results = await vector_store.insert_documents(batch) if batch else []
+            except Exception as e:
+                # El checkpoint no avanza más allá de este batch: se reintentará al reanudar
+                logger.error("Import batch failed: %s", e, extra={"batch": sequence, "documents": len(batch)})
+                block_checkpoint(sequence)
+                stats.failed += len(batch) + invalid
+                stats.documents += len(batch) + invalid
+                queue.task_done()
+                continue
+            created = sum(1 for result in results if result["status"] == "created")
+            stats.created += created
+            stats.failed += len(batch) - created + invalid
+            stats.documents += len(batch) + invalid
+            stats.tokens += sum(count_tokens(doc["content"]) for doc in batch)
+            if created == len(batch):
+                if blocked_at is None or sequence < blocked_at:
+                    completed[sequence] = position
+                    advance_checkpoint()
+            else:
+                block_checkpoint(sequence)
+                # insert_documents informa los errores por documento (no lanza): mismo tratamiento
+                logger.error("Import batch had failed documents", extra={
+                    "batch": sequence,
+                    "failed": len(batch) - created
+                })
+            queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        sequence = 0
+        batch: List[Dict[str, Any]] = []
+        invalid = 0
+        position = start_position
+        async for position, record in records:
+            if isinstance(record, Exception):
+                invalid += 1
+            else:
+                batch.append(record)
+            if len(batch) + invalid >= batch_size:
+                await queue.put((sequence, position, batch, invalid))
+                sequence += 1
+                batch, invalid = [], 0
+        if batch or invalid:
+            await queue.put((sequence, position, batch, invalid))
+
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    return stats.to_dict()
+
+
+def load_checkpoint(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as handle:
+        return json.load(handle).get("checkpoint", 0)
+
+
+def save_checkpoint(path: str, stats: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(stats, handle)
+    os.replace(tmp_path, path)
+
+
+async def import_file(path: str, resume: bool = False, checkpoint_path: str = None,
+                      batch_size: int = None, concurrency: int = None) -> Dict[str, Any]:
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+    offset = load_checkpoint(checkpoint_path) if resume else 0
+    if offset:
+        print(f"🔁 Reanudando desde el byte {offset}")
+
+    last_report = time.monotonic()
+
+    def on_checkpoint(stats: Dict[str, Any]):
+        nonlocal last_report
+        save_checkpoint(checkpoint_path, stats)
+        if time.monotonic() - last_report >= 5:
+            last_report = time.monotonic()
+            print(f"   📊 {stats['documents']} docs | {stats['docs_per_second']} docs/s | "
+                  f"{stats['tokens_per_second']} tokens/s | offset {stats['checkpoint']}")
+
+    return await import_records(
+        iter_jsonl_file(path, offset),
+        batch_size=batch_size,
+        concurrency=concurrency,
+        start_position=offset,
+        on_checkpoint=on_checkpoint
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa un fichero JSONL al vector store")
+    parser.add_argument("path", help="Fichero JSONL con registros {content, metadata}")
+    parser.add_argument("--resume", action="store_true", help="Reanudar desde el último checkpoint")
+    parser.add_argument("--checkpoint", help="Ruta del checkpoint (por defecto <path>.checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=Config.INGEST_MAX_CONCURRENCY)
+    args = parser.parse_args()
+    setup_logging()
+
+    async def run():
+        try:
+            return await import_file(args.path, args.resume, args.checkpoint, args.batch_size, args.concurrency)
+        finally:
+            await vector_store.aclose()
+
+    print(f"📚 Importando {args.path}...")
+    try:
+        stats = asyncio.run(run())
+    finally:
+        stop_logging()
+    print(f"\n✅ Importación completada: {stats['created']} creados, {stats['failed']} con error")
+    print(f"   ⏱️  {stats['elapsed_seconds']}s | {stats['docs_per_second']} docs/s | {stats['tokens_per_second']} tokens/s")
+
+
+if __name__ == "__main__":
+    main()
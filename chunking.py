@@ -0,0 +1,92 @@
+import re
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(Config.CHUNK_TOKENIZER)
+except Exception:  # sin tiktoken (o sin acceso a sus ficheros) se cuenta por palabras
+    _encoding = None
+
+_WORD_RE = re.compile(r"\S+\s*")
+
+
+def token_offsets(text: str) -> List[int]:
+    """
+    Character offset where each token of ``text`` starts
+    """
+    if _encoding is not None:
+        _, offsets = _encoding.decode_with_offsets(_encoding.encode(text, disallowed_special=()))
+        return offsets
+    return [match.start() for match in _WORD_RE.finditer(text)]
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(_WORD_RE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most ``max_tokens`` tokens on a token boundary
+    """
+    offsets = token_offsets(text)
+    if len(offsets) <= max_tokens:
+        return text
+    return text[:offsets[max_tokens]] if max_tokens > 0 else ""
+
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    """
+    Split text into windows of ``chunk_size`` tokens overlapping by ``overlap`` tokens
+
+    Chunks are cut on token boundaries and are exact substrings of ``text``.
+    """
+    chunk_size = chunk_size or Config.CHUNK_SIZE_TOKENS
+    overlap = Config.CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+    offsets = token_offsets(text)
+    if len(offsets) <= chunk_size:
+        return [text] if text.strip() else []
+
+    chunks = []
+    step = chunk_size - overlap
+    for start in range(0, len(offsets), step):
+        end = start + chunk_size
+        chunk = text[offsets[start]:offsets[end] if end < len(offsets) else len(text)].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(offsets):
+            break
+    return chunks
+
+
+def chunk_documents(documents: List[Dict[str, Any]], chunk_size: int = None, overlap: int = None) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Chunk ``{content, metadata}`` documents for ingestion
+
+    Returns ``(source_index, chunk_document)`` pairs. Every chunk's metadata keeps the
+    original metadata plus ``parent_id`` (taken from metadata ``parent_id``/``id`` or
+    generated), ``chunk_index`` and ``chunk_count``.
+    """
+    chunked = []
+    for source_index, doc in enumerate(documents):
+        metadata = doc.get("metadata") or {}
+        parent_id = str(metadata.get("parent_id") or metadata.get("id") or uuid.uuid4())
+        chunks = chunk_text(doc["content"], chunk_size, overlap)
+        for chunk_index, chunk in enumerate(chunks):
+            chunked.append((source_index, {
+                "content": chunk,
+                "metadata": {
+                    **metadata,
+                    "parent_id": parent_id,
+                    "chunk_index": chunk_index,
+                    "chunk_count": len(chunks)
+                }
+            }))
+    return chunked
@@ -4,20 +4,122 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
+    # Logging estructurado (ver structured_logging.py)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" | "text"
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # fracción de requests con logs < WARNING
     # Supabase
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     SUPABASE_TABLE = os.getenv("SUPABASE_TABLE", "documents")
+    # RPC de búsqueda léxica (ver sql/match_documents_text.sql)
+    SUPABASE_TEXT_SEARCH_FUNCTION = os.getenv("SUPABASE_TEXT_SEARCH_FUNCTION", "match_documents_text")
+    # Hybrid retrieval (vector + lexical con reciprocal-rank fusion)
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "2"))
+    # Índice vectorial local en memoria (mirror de la tabla documents por assistant_id)
+    LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "false").lower() == "true"
+    LOCAL_INDEX_ASSISTANTS = [a.strip() for a in os.getenv("LOCAL_INDEX_ASSISTANTS", "").split(",") if a.strip()]
+    LOCAL_INDEX_SYNC_INTERVAL = float(os.getenv("LOCAL_INDEX_SYNC_INTERVAL", "60"))
+    LOCAL_INDEX_FULL_SYNC_EVERY = int(os.getenv("LOCAL_INDEX_FULL_SYNC_EVERY", "10"))  # cada N syncs, rebuild completo (updates/deletes)
+    LOCAL_INDEX_MAX_ROWS = int(os.getenv("LOCAL_INDEX_MAX_ROWS", "50000"))
+    LOCAL_INDEX_PAGE_SIZE = int(os.getenv("LOCAL_INDEX_PAGE_SIZE", "1000"))
+    LOCAL_INDEX_HNSW = os.getenv("LOCAL_INDEX_HNSW", "false").lower() == "true"  # requiere hnswlib
+    # Chunking por tokens en la ingesta
+    CHUNKING_ENABLED = os.getenv("CHUNKING_ENABLED", "true").lower() == "true"
+    CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", "400"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+    CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "cl100k_base")  # encoding de text-embedding-3-*
+    # Contexto RAG: presupuesto de tokens y deduplicación de chunks casi idénticos
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))
+    # Semantic response cache (preguntas parafraseadas → respuesta guardada)
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+    # Sesiones de conversación en servidor (session_id): "memory" (LRU) o "sqlite"
+    SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+    SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", ".cache/sessions.sqlite3")
+    SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_EVICT_INTERVAL = float(os.getenv("SESSION_EVICT_INTERVAL", "600"))  # segundos entre barridos de sesiones expiradas
+    # Sesiones de Meritxell (Agents SDK, SQLite): solo se reenvían los últimos N turnos
+    MERITXELL_SESSION_DB = os.getenv("MERITXELL_SESSION_DB", ".cache/meritxell_sessions.sqlite3")
+    MERITXELL_SESSION_MAX_TURNS = int(os.getenv("MERITXELL_SESSION_MAX_TURNS", "10"))
+    MERITXELL_SESSION_TTL = float(os.getenv("MERITXELL_SESSION_TTL", "86400"))
+    MERITXELL_SESSION_CACHE_SIZE = int(os.getenv("MERITXELL_SESSION_CACHE_SIZE", "1024"))  # objetos de sesión abiertos (LRU)
+    # Compactación del historial: últimos N turnos literales, el resto resumido / truncado
+    HISTORY_COMPACTION_ENABLED = os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true"
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))
+    HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+    HISTORY_TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("HISTORY_TOOL_OUTPUT_MAX_TOKENS", "500"))
+    HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+    HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "400"))
+    HISTORY_SUMMARY_CACHE_ENTRIES = int(os.getenv("HISTORY_SUMMARY_CACHE_ENTRIES", "1000"))
+    # Ingesta batch (POST /documents/batch)
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+    INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", "4"))
+    INGEST_MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", str(8 * 1024 * 1024)))  # registro JSONL más largo aceptado
+    # Threads dedicados a las llamadas síncronas de supabase-py (PostgREST)
+    SUPABASE_MAX_WORKERS = int(os.getenv("SUPABASE_MAX_WORKERS", "16"))
     
     # OpenRouter
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
     OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
+    OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+    OPENROUTER_TEMPERATURE = float(os.getenv("OPENROUTER_TEMPERATURE", "0.7"))
+    
+    # Exact-match response cache delante de chat_completion (solo llamadas deterministas)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # "memory" | "redis"
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    # Solo se cachean requests con temperature <= este valor: con OPENROUTER_TEMPERATURE=0.7 (defecto)
+    # solo entran las llamadas que piden una temperatura baja (ej: resúmenes del historial a 0)
+    RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.3"))
+    
+    # OpenRouter HTTP client (pool compartido durante toda la vida de la app)
+    OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "true").lower() == "true"
+    OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "30.0"))
+    OPENROUTER_CONNECT_TIMEOUT = float(os.getenv("OPENROUTER_CONNECT_TIMEOUT", "5.0"))
+    OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "100"))
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "30.0"))
     
     # OpenAI (for embeddings)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None = api.openai.com (ej: mock local de benchmarks/)
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "10.0"))
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "2"))
+    
+    # Embedding cache (LRU + TTL, optional SQLite persistence)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+    EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")  # e.g. .cache/embeddings.sqlite3
     
     # Weather API
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+    WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://api.weatherapi.com").rstrip("/")
+    
+    # Tool execution (auto-tools loop)
+    TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "15.0"))
+    TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+    # HTTP client compartido por las tools
+    TOOL_HTTP_TIMEOUT = float(os.getenv("TOOL_HTTP_TIMEOUT", "10.0"))
+    TOOL_HTTP_CONNECT_TIMEOUT = float(os.getenv("TOOL_HTTP_CONNECT_TIMEOUT", "3.0"))
+    TOOL_HTTP_MAX_CONNECTIONS = int(os.getenv("TOOL_HTTP_MAX_CONNECTIONS", "50"))
+    TOOL_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("TOOL_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    TOOL_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("TOOL_HTTP_KEEPALIVE_EXPIRY", "30.0"))
+    TOOL_HTTP_MAX_PER_HOST = int(os.getenv("TOOL_HTTP_MAX_PER_HOST", "10"))
+    TOOL_HTTP_HTTP2 = os.getenv("TOOL_HTTP_HTTP2", "true").lower() == "true"
+    TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+    TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1000"))
+    WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+    VECTOR_SEARCH_CACHE_TTL = float(os.getenv("VECTOR_SEARCH_CACHE_TTL", "60"))
     
     @classmethod
     def validate(cls):
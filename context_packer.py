@@ -0,0 +1,72 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from chunking import count_tokens, truncate_to_tokens
+from config import Config
+
+_SENTENCE_END_RE = re.compile(r"[.!?…](?=\s|$)")
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = text.lower().split()
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _is_near_duplicate(shingles: set, seen: List[set], threshold: float) -> bool:
+    for other in seen:
+        union = shingles | other
+        if union and len(shingles & other) / len(union) >= threshold:
+            return True
+    return False
+
+
+def truncate_at_sentence(text: str, max_tokens: int) -> str:
+    """
+    Truncate to ``max_tokens`` and then back to the last complete sentence (if any)
+    """
+    truncated = truncate_to_tokens(text, max_tokens)
+    if truncated == text:
+        return text
+    ends = list(_SENTENCE_END_RE.finditer(truncated))
+    if ends:
+        return truncated[:ends[-1].end()]
+    return truncated.rstrip()
+
+
+def pack_context(documents: List[Dict[str, Any]], budget_tokens: int = None, dedup_threshold: float = None) -> Optional[str]:
+    """
+    Build the vector-store context from ranked documents within a token budget
+
+    Documents are taken in relevance order, near-identical ones (word-shingle
+    Jaccard >= ``dedup_threshold``) are skipped, and the last one that does not
+    fit is truncated at a sentence boundary.
+    """
+    budget_tokens = budget_tokens or Config.CONTEXT_TOKEN_BUDGET
+    dedup_threshold = Config.CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+
+    parts: List[str] = []
+    seen: List[set] = []
+    used = 0
+    for doc in documents:
+        content = (doc.get("content") or "").strip()
+        if not content:
+            continue
+
+        shingles = _shingles(content)
+        if _is_near_duplicate(shingles, seen, dedup_threshold):
+            continue
+
+        tokens = count_tokens(content)
+        if used + tokens > budget_tokens:
+            content = truncate_at_sentence(content, budget_tokens - used)
+            if content:
+                parts.append(content)
+            break
+
+        parts.append(content)
+        seen.append(shingles)
+        used += tokens
+
+    return "\n".join(parts) if parts else None
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a query so trivial variations (case, whitespace) share a cache entry
+    """
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    In-process LRU + TTL cache for embeddings keyed by (normalized text, model)
+
+    Embeddings are stored as compact float32 arrays. When ``path`` is set, entries
+    are also written to a local SQLite file so the cache survives restarts; expired
+    rows are purged when the file is opened and every ``PURGE_EVERY`` writes.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries: "OrderedDict[str, Tuple[float, array]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.purged = 0
+        self._writes = 0
+        self.open()
+
+    def open(self):
+        """
+        Open (or reopen after close(), e.g. on a new lifespan) the SQLite file and purge expired rows
+        """
+        if not self.path or self._db is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, embedding BLOB, created_at REAL)"
+        )
+        db.commit()
+        self._db = db
+        self._purge_expired()
+
+    def _purge_expired(self):
+        with self._db_lock:
+            cursor = self._db.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self._db.commit()
+        self.purged += cursor.rowcount
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, vector: array):
+        self._entries[key] = (created_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, array]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT created_at, embedding FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        vector = array("f")
+        vector.frombytes(row[1])
+        return row[0], vector
+
+    def _disk_set(self, key: str, model: str, created_at: float, vector: array):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, embedding, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, vector.tobytes(), created_at)
+            )
+            self._db.commit()
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self._purge_expired()
+
+    async def get(self, text: str, model: str) -> Optional[List[float]]:
+        key = self.make_key(text, model)
+
+        entry = self._entries.get(key)
+        if entry and not self._expired(entry[0]):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].tolist()
+        if entry:
+            del self._entries[key]
+
+        if self._db is not None:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry and not self._expired(entry[0]):
+                self._remember(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1].tolist()
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, model: str, embedding: List[float]):
+        key = self.make_key(text, model)
+        created_at = time.time()
+        vector = array("f", embedding)
+        self._remember(key, created_at, vector)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, model, created_at, vector)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "purged": self.purged,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "persistent": self._db is not None
+        }
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+
+# Global instance
+embedding_cache = EmbeddingCache(
+    max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.EMBEDDING_CACHE_TTL,
+    path=Config.EMBEDDING_CACHE_PATH
+)
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from chunking import count_tokens, token_offsets, truncate_to_tokens
+from config import Config
+from openrouter_client import openrouter_client
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separadores del formato chat
+
+SUMMARY_PROMPT = (
+    "Resume de forma concisa la conversación siguiente para usarla como contexto en los "
+    "próximos turnos. Conserva hechos, datos, resultados de tools, decisiones y peticiones "
+    "pendientes del usuario. Responde solo con el resumen, en el idioma de la conversación."
+)
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    tokens = count_tokens(message.get("content") or "")
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+def history_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def split_turns(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+    """
+    Split into leading system messages and turns (each turn starts at a user message)
+
+    Assistant tool_calls and their tool results always stay in the same turn.
+    """
+    start = 0
+    while start < len(messages) and messages[start].get("role") == "system":
+        start += 1
+    turns: List[List[Dict[str, Any]]] = []
+    for message in messages[start:]:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return messages[:start], turns
+
+
+def tail_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keep the last ``max_tokens`` tokens of text (the most recent part of a rolling preview)
+    """
+    offsets = token_offsets(text)
+    if len(offsets) <= max_tokens:
+        return text
+    return text[offsets[-max_tokens]:] if max_tokens > 0 else ""
+
+
+def transcript(messages: List[Dict[str, Any]], max_tokens_per_message: Optional[int] = None) -> str:
+    lines = []
+    for message in messages:
+        content = message.get("content") or ""
+        if max_tokens_per_message is not None:
+            content = truncate_to_tokens(content, max_tokens_per_message)
+        role = message.get("role", "user").upper()
+        if message.get("tool_calls"):
+            calls = ", ".join(
+                f"{call['function']['name']}({call['function'].get('arguments', '')})"
+                for call in message["tool_calls"]
+            )
+            lines.append(f"{role} (tool_calls): {calls} {content}".rstrip())
+        else:
+            lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+class HistoryCompactor:
+    """
+    Keep prompts within a token budget: the last N turns stay verbatim, large tool
+    outputs become truncated previews and older turns are replaced by a rolling summary
+
+    Summaries are cached by a hash of the summarized prefix; when the conversation
+    grows, the longest cached prefix summary is extended with only the new turns.
+    """
+
+    def __init__(self, token_budget: int = 6000, keep_turns: int = 4, tool_output_max_tokens: int = 500,
+                 summary_max_tokens: int = 400, summarize: bool = True, max_summaries: int = 1000,
+                 enabled: bool = True):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.summarize = summarize
+        self.max_summaries = max_summaries
+        self.enabled = enabled
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self.compactions = 0
+        self.truncated_tool_outputs = 0
+        self.summaries_generated = 0
+        self.summary_cache_hits = 0
+        self.tokens_saved = 0
+
+    def _truncate_tool_outputs(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Truncate consumed tool results: those followed by an assistant message with content
+
+        A result only becomes consumed once, so its preview (and the summary prefix
+        hashes built on it) stays the same on every later compaction.
+        """
+        answered = [
+            i for i, message in enumerate(messages)
+            if message.get("role") == "assistant" and message.get("content")
+        ]
+        last_answer = answered[-1] if answered else -1
+        compacted = []
+        for i, message in enumerate(messages):
+            if message.get("role") == "tool" and i < last_answer:
+                tokens = count_tokens(message.get("content") or "")
+                if tokens > self.tool_output_max_tokens:
+                    preview = truncate_to_tokens(message["content"], self.tool_output_max_tokens)
+                    message = {**message, "content": f"{preview}\n… [tool output truncated, {tokens} tokens]"}
+                    self.truncated_tool_outputs += 1
+            compacted.append(message)
+        return compacted
+
+    def _fallback_summary(self, previous: Optional[str], messages: List[Dict[str, Any]]) -> str:
+        preview = transcript(messages, max_tokens_per_message=60)
+        text = f"{previous}\n{preview}" if previous else preview
+        return tail_tokens(text, self.summary_max_tokens)
+
+    async def _generate_summary(self, previous: Optional[str], messages: List[Dict[str, Any]]) -> str:
+        if not self.summarize:
+            return self._fallback_summary(previous, messages)
+
+        conversation = transcript(messages, max_tokens_per_message=self.tool_output_max_tokens)
+        if previous:
+            conversation = f"Resumen previo:\n{previous}\n\nNuevos mensajes:\n{conversation}"
+        result = await openrouter_client.chat_completion(
+            messages=[
+                {"role": "system", "content": f"{SUMMARY_PROMPT} Máximo {self.summary_max_tokens} tokens."},
+                {"role": "user", "content": conversation}
+            ],
+            temperature=0
+        )
+        summary = (result.get("content") or "").strip()
+        if result.get("finish_reason") == "error" or not summary:
+            logger.warning("History summary failed, using truncated preview")
+            return self._fallback_summary(previous, messages)
+        self.summaries_generated += 1
+        return truncate_to_tokens(summary, self.summary_max_tokens)
+
+    async def _summary(self, messages: List[Dict[str, Any]]) -> str:
+        # Hash incremental por prefijo: permite reutilizar el resumen del prefijo más largo ya resumido
+        digest = hashlib.sha256()
+        keys = []
+        for message in messages:
+            digest.update(json.dumps(message, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            keys.append(digest.hexdigest())
+
+        if keys[-1] in self._summaries:
+            self.summary_cache_hits += 1
+            self._summaries.move_to_end(keys[-1])
+            return self._summaries[keys[-1]]
+
+        start, previous = 0, None
+        for i in range(len(keys) - 2, -1, -1):
+            if keys[i] in self._summaries:
+                start, previous = i + 1, self._summaries[keys[i]]
+                break
+
+        summary = await self._generate_summary(previous, messages[start:])
+        self._summaries[keys[-1]] = summary
+        while len(self._summaries) > self.max_summaries:
+            self._summaries.popitem(last=False)
+        return summary
+
+    async def compact(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the messages to send upstream; the input list is never modified
+        """
+        if not self.enabled:
+            return messages
+        total = history_tokens(messages)
+        if total <= self.token_budget:
+            return messages
+
+        compacted = self._truncate_tool_outputs(messages)
+        if history_tokens(compacted) > self.token_budget:
+            system, turns = split_turns(compacted)
+            cut = max(len(turns) - self.keep_turns, 0)
+            older = [message for turn in turns[:cut] for message in turn]
+            if older:
+                summary = await self._summary(older)
+                compacted = system + [{
+                    "role": "system",
+                    "content": f"Resumen de la conversación anterior:\n{summary}"
+                }] + [message for turn in turns[cut:] for message in turn]
+
+        self.compactions += 1
+        self.tokens_saved += total - history_tokens(compacted)
+        return compacted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "token_budget": self.token_budget,
+            "keep_turns": self.keep_turns,
+            "compactions": self.compactions,
+            "truncated_tool_outputs": self.truncated_tool_outputs,
+            "summaries_generated": self.summaries_generated,
+            "summary_cache_hits": self.summary_cache_hits,
+            "cached_summaries": len(self._summaries),
+            "tokens_saved": self.tokens_saved
+        }
+
+
+# Global instance
+history_compactor = HistoryCompactor(
+    token_budget=Config.HISTORY_TOKEN_BUDGET,
+    keep_turns=Config.HISTORY_KEEP_TURNS,
+    tool_output_max_tokens=Config.HISTORY_TOOL_OUTPUT_MAX_TOKENS,
+    summary_max_tokens=Config.HISTORY_SUMMARY_MAX_TOKENS,
+    summarize=Config.HISTORY_SUMMARY_ENABLED,
+    max_summaries=Config.HISTORY_SUMMARY_CACHE_ENTRIES,
+    enabled=Config.HISTORY_COMPACTION_ENABLED
+)
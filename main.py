@@ -1,32 +1,89 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
+from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import json
+import logging
 
 from config import Config
+from structured_logging import setup_logging, stop_logging, RequestContextMiddleware
 from supabase_client import vector_store
+from embedding_cache import embedding_cache
+from context_packer import pack_context
+from semantic_cache import semantic_cache
+from response_cache import response_cache
+from session_store import session_store
+from history_compactor import history_compactor
 from openrouter_client import openrouter_client
-from tools import TOOL_FUNCTIONS
-from tools.vector_store_tool import search_vector_store
-from meritxell_workflow_agent import run_workflow, WorkflowInput
+from tools import TOOL_REGISTRY
+from tools.cache import tool_cache_key, tool_result_cache, is_error_result
+from tools.runtime import tool_runtime
+from bulk_import import import_records, iter_jsonl_stream
+from meritxell_workflow_agent import run_workflow, run_workflow_streamed, WorkflowInput, session_has_history, record_session_turn, clear_session, evict_expired_sessions
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="LLM Auto Backend",
-    description="Backend que integra OpenRouter con Supabase Vector Store",
-    version="1.0.0"
-)
+logger = logging.getLogger(__name__)
 
-# Validate configuration on startup
-@app.on_event("startup")
-async def startup_event():
+async def evict_sessions():
+    expired = await session_store.evict_expired()
+    if expired:
+        logger.info("Evicted expired sessions", extra={"sessions": expired})
+    expired = await evict_expired_sessions()
+    if expired:
+        logger.info("Evicted expired Meritxell sessions", extra={"sessions": expired})
+
+async def session_eviction_loop():
+    while True:
+        await asyncio.sleep(Config.SESSION_EVICT_INTERVAL)
+        try:
+            await evict_sessions()
+        except Exception:
+            logger.exception("Session eviction failed")
+
+# App lifespan: validate configuration and manage shared clients
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging emparejado con stop_logging() del shutdown (un ciclo por lifespan)
+    setup_logging()
     try:
         Config.validate()
-        print("✅ Configuration validated successfully")
+        logger.info("Configuration validated successfully")
     except ValueError as e:
-        print(f"❌ Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         raise
+    
+    # Cliente HTTP compartido (keep-alive + HTTP/2) para OpenRouter
+    await openrouter_client.start()
+    await tool_runtime.start()
+    # Reabre el fichero del embedding cache si un lifespan anterior lo cerró
+    embedding_cache.open()
+    # Índices vectoriales locales (opcional, LOCAL_INDEX_ENABLED)
+    await vector_store.start_local_indexes()
+    await evict_sessions()
+    eviction_task = asyncio.create_task(session_eviction_loop())
+    try:
+        yield
+    finally:
+        eviction_task.cancel()
+        await openrouter_client.aclose()
+        await tool_runtime.aclose()
+        await vector_store.aclose()
+        embedding_cache.close()
+        await response_cache.close()
+        await session_store.close()
+        stop_logging()
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="LLM Auto Backend",
+    description="Backend que integra OpenRouter con Supabase Vector Store",
+    version="1.0.0",
+    lifespan=lifespan
+)
+# Correlation id por request (X-Request-ID) y muestreo de logs
+app.add_middleware(RequestContextMiddleware)
 
 # Pydantic models
 class ChatMessage(BaseModel):
@@ -43,9 +100,13 @@ class ChatRequest(BaseModel):
     messages: List[ChatMessage]
     use_vector_context: bool = True
     vector_limit: int = 5
+    search_mode: Literal["fallback", "hybrid"] = "fallback"  # "hybrid" = vector + lexical con RRF
     assistant_id: str
     tools: Optional[List[ToolDefinition]] = None
+    tool_names: Optional[List[str]] = None  # Tools registradas en el servidor (schemas inyectados); ["*"] = todas
     tool_choice: Optional[str] = "auto"  # "auto", "none", or specific tool
+    temperature: Optional[float] = None  # None = OPENROUTER_TEMPERATURE; <= RESPONSE_CACHE_MAX_TEMPERATURE se cachea
+    session_id: Optional[str] = None  # Con session_id el historial vive en el servidor: enviar solo el turno nuevo
 
 class ToolExecutionLog(BaseModel):
     tool_name: str
@@ -60,23 +121,216 @@ class ChatResponse(BaseModel):
     # Metadata para auto-tools
     iterations: Optional[int] = None
     tools_executed: Optional[List[ToolExecutionLog]] = None
+    cached: Optional[bool] = None  # True si la respuesta viene del semantic cache
 
 # Tool execution functions
-async def execute_tool(tool_name: str, arguments: Dict[str, Any], assistant_id: str = None) -> str:
+async def dispatch_tool(tool_name: str, arguments: Dict[str, Any], assistant_id: str = None) -> str:
     """
     Execute a tool based on its name
     """
-    # Búsqueda en vector store (caso especial con assistant_id)
-    if tool_name == "search_vector_store":
-        return await search_vector_store(arguments, assistant_id)
+    spec = TOOL_REGISTRY.get(tool_name)
+    if spec is None:
+        # Tool no encontrada
+        return json.dumps({"error": f"Unknown tool: {tool_name}"})
+    
+    # Cada tool recibe solo el contexto del request que declara (ej: assistant_id)
+    return await spec(arguments, {"assistant_id": assistant_id})
+
+async def execute_tool(tool_name: str, arguments: Dict[str, Any], assistant_id: str = None, memo: Optional[Dict[str, asyncio.Future]] = None) -> str:
+    """
+    Execute a tool with caching
     
-    # Buscar la función en el mapeo de tools
-    if tool_name in TOOL_FUNCTIONS:
-        tool_func = TOOL_FUNCTIONS[tool_name]
-        return await tool_func(arguments)
+    ``memo`` memoiza resultados dentro de un mismo request (incluidos tool calls
+    idénticos y concurrentes); las tools cuyo ``ToolSpec`` declara ``cache`` se
+    cachean además entre requests con su propio TTL. Los resultados con error no se cachean.
+    """
+    spec = TOOL_REGISTRY.get(tool_name)
+    policy = spec.cache if spec is not None and Config.TOOL_CACHE_ENABLED else None
+    key = tool_cache_key(tool_name, arguments, policy, assistant_id)
+    
+    if memo is not None and key in memo:
+        return await asyncio.shield(memo[key])
+    
+    async def run() -> str:
+        if policy is not None:
+            cached = await tool_result_cache.get(key)
+            if cached is not None:
+                return cached
+        if spec is not None and spec.semaphore is not None:
+            # Límite propio de la tool (compartido entre requests): solo lo ocupa la ejecución real
+            async with spec.semaphore:
+                result = await dispatch_tool(tool_name, arguments, assistant_id)
+        else:
+            result = await dispatch_tool(tool_name, arguments, assistant_id)
+        if policy is not None and not is_error_result(result):
+            await tool_result_cache.set(key, result, policy.ttl_seconds)
+        return result
+    
+    if memo is None:
+        return await run()
+    
+    memo[key] = asyncio.ensure_future(run())
+    try:
+        result = await asyncio.shield(memo[key])
+    except BaseException:
+        memo.pop(key, None)
+        raise
+    if is_error_result(result):
+        memo.pop(key, None)
+    return result
+
+async def run_tool_call(tool_call: Dict[str, Any], assistant_id: str, semaphore: asyncio.Semaphore, memo: Optional[Dict[str, asyncio.Future]] = None) -> Dict[str, Any]:
+    """
+    Ejecuta un tool call con límite de concurrencia y timeout por tool
     
-    # Tool no encontrada
-    return json.dumps({"error": f"Unknown tool: {tool_name}"})
+    Nunca lanza excepción: los errores y timeouts se devuelven como resultado JSON
+    para que el LLM pueda verlos y el resto de tools del turno siga adelante.
+    """
+    tool_name = tool_call["function"]["name"]
+    try:
+        arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+    except json.JSONDecodeError as e:
+        arguments = {}
+        tool_result = json.dumps({"error": f"Invalid arguments for {tool_name}: {str(e)}"})
+    else:
+        spec = TOOL_REGISTRY.get(tool_name)
+        timeout = spec.timeout if spec is not None and spec.timeout else Config.TOOL_TIMEOUT
+        async with semaphore:
+            try:
+                # La espera por el límite propio de la tool cuenta dentro del timeout
+                tool_result = await asyncio.wait_for(
+                    execute_tool(tool_name, arguments, assistant_id, memo),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                tool_result = json.dumps({"error": f"Tool {tool_name} timed out after {timeout}s"})
+            except Exception as e:
+                tool_result = json.dumps({"error": f"Tool {tool_name} failed: {str(e)}"})
+    
+    return {
+        "tool_call_id": tool_call["id"],
+        "tool_name": tool_name,
+        "arguments": arguments,
+        "result": tool_result
+    }
+
+def start_tool_calls(tool_calls: List[Dict[str, Any]], assistant_id: str, memo: Optional[Dict[str, asyncio.Future]] = None) -> List[asyncio.Task]:
+    """
+    Lanza concurrentemente los tool calls de un turno (tasks en el orden original)
+    """
+    semaphore = asyncio.Semaphore(Config.TOOL_MAX_CONCURRENCY)
+    return [
+        asyncio.create_task(run_tool_call(tool_call, assistant_id, semaphore, memo))
+        for tool_call in tool_calls
+    ]
+
+def tool_execution_log(run: Dict[str, Any]) -> ToolExecutionLog:
+    tool_result = run["result"]
+    return ToolExecutionLog(
+        tool_name=run["tool_name"],
+        arguments=run["arguments"],
+        result_preview=tool_result[:200] if len(tool_result) > 200 else tool_result
+    )
+
+def tool_message(run: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "role": "tool",
+        "content": run["result"],
+        "tool_call_id": run["tool_call_id"]
+    }
+
+def resolve_tools(request: ChatRequest) -> Optional[List[Dict[str, Any]]]:
+    """
+    Tools para OpenRouter: schemas registrados pedidos por nombre + definiciones enviadas por el cliente
+    
+    Si el cliente envía una definición con el mismo nombre que una registrada, prevalece la del cliente.
+    """
+    tools: Dict[str, Dict[str, Any]] = {}
+    if request.tool_names:
+        names = None if "*" in request.tool_names else request.tool_names
+        for schema in TOOL_REGISTRY.schemas(names):
+            tools[schema["function"]["name"]] = schema
+    for tool in request.tools or []:
+        definition = tool.dict()
+        tools[definition["function"].get("name")] = definition
+    return list(tools.values()) or None
+
+async def get_vector_context(request: ChatRequest) -> Optional[str]:
+    """
+    Busca contexto en el vector store usando el último mensaje del usuario
+    """
+    if not request.use_vector_context or not request.messages:
+        return None
+    
+    # Use the last user message for context search
+    last_message = request.messages[-1].content if request.messages[-1].role == "user" else ""
+    if not last_message:
+        return None
+    
+    # Search for similar documents in vector store
+    similar_docs = await vector_store.search_similar(
+        query=last_message,
+        limit=request.vector_limit,
+        assistant_id=request.assistant_id,
+        mode=request.search_mode
+    )
+    if not similar_docs:
+        return None
+    
+    # Pack documents in relevance order within the context token budget
+    return pack_context(similar_docs)
+
+def message_dicts(messages: List[ChatMessage]) -> List[Dict[str, Any]]:
+    """
+    Mensajes en el formato de OpenRouter (sin campos None)
+    """
+    return [msg.dict(exclude_none=True) for msg in messages]
+
+async def load_session_history(request: ChatRequest) -> List[Dict[str, Any]]:
+    """
+    Historial guardado de la sesión (vacío sin session_id o si ha expirado)
+    """
+    if not request.session_id:
+        return []
+    return await session_store.load(request.session_id)
+
+async def save_session_turn(request: ChatRequest, new_messages: List[Dict[str, Any]], produced: List[Dict[str, Any]]):
+    """
+    Añade al log de la sesión los mensajes del request y los generados en este turno
+    """
+    if request.session_id:
+        await session_store.append(request.session_id, new_messages + produced)
+
+def assistant_message(content: Optional[str], tool_calls: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    message = {"role": "assistant", "content": content or ""}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return message
+
+def semantic_cache_namespace(request: ChatRequest) -> str:
+    """
+    Namespace del semantic cache: assistant + opciones que cambian la respuesta
+    (contexto RAG, modo y límite de búsqueda, temperatura efectiva)
+    """
+    retrieval = f"{request.search_mode}:{request.vector_limit}" if request.use_vector_context else "no-context"
+    temperature = Config.OPENROUTER_TEMPERATURE if request.temperature is None else request.temperature
+    return f"{request.assistant_id}:{retrieval}:t={temperature:g}"
+
+def semantic_cache_question(request: ChatRequest, history: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+    """
+    Pregunta cacheable: primer turno de usuario, sin tools (respuestas deterministas por pregunta)
+    """
+    if not Config.SEMANTIC_CACHE_ENABLED or request.tools or request.tool_names or history:
+        return None
+    if len(request.messages) != 1 or request.messages[0].role != "user":
+        return None
+    return request.messages[0].content.strip() or None
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Formatea un evento Server-Sent Events
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 # Main endpoint
 @app.post("/chat", response_model=ChatResponse)
@@ -86,59 +340,42 @@ async def chat_endpoint(request: ChatRequest):
     Soporta function calling / tools
     """
     try:
-        context = None
+        history = await load_session_history(request)
+        new_messages = message_dicts(request.messages)
         
-        # Get context from vector store if requested
-        if request.use_vector_context and request.messages:
-            # Use the last user message for context search
-            last_message = request.messages[-1].content if request.messages[-1].role == "user" else ""
-            
-            if last_message:
-                # Search for similar documents in vector store
-                similar_docs = await vector_store.search_similar(
-                    query=last_message,
-                    limit=request.vector_limit,
-                    assistant_id=request.assistant_id
+        # Semantic cache: paráfrasis de preguntas ya respondidas para este assistant
+        question = semantic_cache_question(request, history)
+        question_embedding = await vector_store.generate_embedding(question) if question else None
+        if question_embedding:
+            cached = semantic_cache.lookup(semantic_cache_namespace(request), question_embedding)
+            if cached:
+                logger.info("Semantic cache hit", extra={"similarity": round(cached["similarity"], 3)})
+                await save_session_turn(request, new_messages, [assistant_message(cached["response"])])
+                return ChatResponse(
+                    response=cached["response"],
+                    context_used=cached.get("context_used"),
+                    finish_reason="stop",
+                    cached=True
                 )
-                
-                if similar_docs:
-                    # Combine context from similar documents
-                    context = "\n".join([doc.get("content", "") for doc in similar_docs[:3]])
         
-        print(f"\n🔍 Context found: {len(context) if context else 0} characters")
-        if context:
-            print(f"📄 Context preview: {context[:100]}...")
+        # Get context from vector store if requested
+        context = await get_vector_context(request)
         
-        # Convert messages to the format expected by OpenRouter
-        openrouter_messages = []
-        for msg in request.messages:
-            message_dict = {"role": msg.role, "content": msg.content}
-            if msg.tool_calls:
-                message_dict["tool_calls"] = msg.tool_calls
-            if msg.tool_call_id:
-                message_dict["tool_call_id"] = msg.tool_call_id
-            openrouter_messages.append(message_dict)
+        logger.debug("Vector context retrieved", extra={"context_chars": len(context) if context else 0})
         
-        print(f"\n💬 Messages to send ({len(openrouter_messages)} messages):")
-        for i, msg in enumerate(openrouter_messages):
-            content_preview = str(msg.get('content', ''))[:50] if msg.get('content') else 'N/A'
-            print(f"  {i+1}. [{msg['role'].upper()}]: {content_preview}...")
+        # Session history + new turn, in the format expected by OpenRouter (older turns compacted)
+        openrouter_messages = await history_compactor.compact(history + new_messages)
         
-        # Prepare tools for OpenRouter
-        tools = None
-        if request.tools:
-            tools = [tool.dict() for tool in request.tools]
+        # Prepare tools for OpenRouter (registered schemas + client definitions)
+        tools = resolve_tools(request)
         
         # Call OpenRouter with context and tools
-        print(f"\n🚀 Calling OpenRouter...")
-        if tools:
-            print(f"🔧 Tools enabled: {len(tools)} tools")
-        
         response_data = await openrouter_client.chat_completion(
             messages=openrouter_messages,
             context=context,
             tools=tools,
-            tool_choice=request.tool_choice
+            tool_choice=request.tool_choice,
+            temperature=request.temperature
         )
         
         # Check if response contains tool calls
@@ -146,18 +383,22 @@ async def chat_endpoint(request: ChatRequest):
         tool_calls = response_data.get("tool_calls")
         response_content = response_data.get("content", "")
         
-        print(f"\n✅ OpenRouter response:")
-        print(f"   📝 Finish reason: {finish_reason}")
-        print(f"   🔧 Tool calls: {len(tool_calls) if tool_calls else 0}")
+        # Tool calls are returned to the client to handle
+        logger.info("Chat completed", extra={
+            "messages": len(openrouter_messages),
+            "tools": len(tools) if tools else 0,
+            "finish_reason": finish_reason,
+            "tool_calls": len(tool_calls) if tool_calls else 0
+        })
+        
+        if question_embedding and finish_reason == "stop" and not tool_calls:
+            semantic_cache.store(semantic_cache_namespace(request), question_embedding, {
+                "response": response_content,
+                "context_used": context
+            })
         
-        # If there are tool calls, we might want to execute them automatically
-        # or return them to the client to handle
-        if tool_calls and finish_reason == "tool_calls":
-            print(f"\n🔨 Processing tool calls...")
-            for tool_call in tool_calls:
-                tool_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
-                print(f"   🔹 Executing: {tool_name} with {arguments}")
+        if finish_reason != "error":
+            await save_session_turn(request, new_messages, [assistant_message(response_content, tool_calls)])
         
         return ChatResponse(
             response=response_content,
@@ -167,6 +408,7 @@ async def chat_endpoint(request: ChatRequest):
         )
         
     except Exception as e:
+        logger.exception("Chat request failed")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 # Auto-loop endpoint with automatic tool execution
@@ -177,39 +419,30 @@ async def chat_auto_tools_endpoint(request: ChatRequest):
     hasta que el LLM dé una respuesta final
     """
     try:
-        context = None
         max_iterations = 5  # Prevenir loops infinitos
         iteration = 0
         tools_executed_log = []  # Log de tools ejecutadas
+        tool_memo = {}  # Resultados de tools memoizados durante este request
         
         # Get initial context if requested
-        if request.use_vector_context and request.messages:
-            last_message = request.messages[-1].content if request.messages[-1].role == "user" else ""
-            if last_message:
-                similar_docs = await vector_store.search_similar(
-                    query=last_message,
-                    limit=request.vector_limit,
-                    assistant_id=request.assistant_id
-                )
-                if similar_docs:
-                    context = "\n".join([doc.get("content", "") for doc in similar_docs[:3]])
-        
-        # Working messages list
-        messages = [msg.dict() for msg in request.messages]
-        tools = [tool.dict() for tool in request.tools] if request.tools else None
+        context = await get_vector_context(request)
         
-        print(f"\n🔄 Starting auto-tool loop...")
+        # Working messages list: session history + new turn
+        history = await load_session_history(request)
+        new_messages = message_dicts(request.messages)
+        messages = history + new_messages
+        tools = resolve_tools(request)
         
         while iteration < max_iterations:
             iteration += 1
-            print(f"\n🔁 Iteration {iteration}/{max_iterations}")
             
             # Call OpenRouter
             response_data = await openrouter_client.chat_completion(
-                messages=messages,
+                messages=await history_compactor.compact(messages),
                 context=context if iteration == 1 else None,  # Context only on first call
                 tools=tools,
-                tool_choice=request.tool_choice
+                tool_choice=request.tool_choice,
+                temperature=request.temperature
             )
             
             finish_reason = response_data.get("finish_reason", "stop")
@@ -218,7 +451,14 @@ async def chat_auto_tools_endpoint(request: ChatRequest):
             
             # If no tool calls, we're done
             if finish_reason != "tool_calls" or not tool_calls:
-                print(f"✅ Final response (finish_reason: {finish_reason})")
+                logger.info("Auto-tools completed", extra={
+                    "iterations": iteration,
+                    "finish_reason": finish_reason,
+                    "tools_executed": len(tools_executed_log)
+                })
+                if finish_reason != "error":
+                    messages.append(assistant_message(content))
+                    await save_session_turn(request, new_messages, messages[len(history) + len(new_messages):])
                 return ChatResponse(
                     response=content,
                     context_used=context,
@@ -229,45 +469,25 @@ async def chat_auto_tools_endpoint(request: ChatRequest):
                 )
             
             # Add assistant message with tool calls
-            assistant_msg = {
-                "role": "assistant",
-                "content": content or "",
-                "tool_calls": tool_calls
-            }
-            messages.append(assistant_msg)
+            messages.append(assistant_message(content, tool_calls))
             
-            print(f"🔧 Executing {len(tool_calls)} tool call(s)...")
+            # Execute this turn's tool calls concurrently, keeping tool_call order
+            tool_runs = await asyncio.gather(*start_tool_calls(tool_calls, request.assistant_id, tool_memo))
             
-            # Execute each tool call
-            for tool_call in tool_calls:
-                tool_name = tool_call["function"]["name"]
-                arguments = json.loads(tool_call["function"]["arguments"])
-                tool_call_id = tool_call["id"]
-                
-                print(f"   ⚙️  {tool_name}({arguments})")
-                
-                # Execute tool with assistant_id from request
-                tool_result = await execute_tool(tool_name, arguments, request.assistant_id)
-                
+            for run in tool_runs:
                 # Log tool execution
-                tools_executed_log.append(ToolExecutionLog(
-                    tool_name=tool_name,
-                    arguments=arguments,
-                    result_preview=tool_result[:200] if len(tool_result) > 200 else tool_result
-                ))
+                tools_executed_log.append(tool_execution_log(run))
                 
                 # Add tool response message
-                tool_msg = {
-                    "role": "tool",
-                    "content": tool_result,
-                    "tool_call_id": tool_call_id
-                }
-                messages.append(tool_msg)
-                
-                print(f"   ✓ Result: {tool_result[:100]}...")
+                messages.append(tool_message(run))
+            logger.debug("Tool calls executed", extra={
+                "iteration": iteration,
+                "tools": [run["tool_name"] for run in tool_runs]
+            })
         
-        # Max iterations reached
-        print(f"⚠️  Max iterations ({max_iterations}) reached")
+        # Max iterations reached: los tool rounds ejecutados quedan en la sesión
+        logger.warning("Auto-tools max iterations reached", extra={"iterations": max_iterations})
+        await save_session_turn(request, new_messages, messages[len(history) + len(new_messages):])
         return ChatResponse(
             response="Max iterations reached. Unable to complete request.",
             context_used=context,
@@ -278,8 +498,173 @@ async def chat_auto_tools_endpoint(request: ChatRequest):
         )
         
     except Exception as e:
+        logger.exception("Chat request failed")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+# Streaming endpoints (Server-Sent Events)
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Variante en streaming de /chat: reenvía los deltas de OpenRouter como SSE
+    
+    Eventos: ``context``, ``token``, ``tool_call`` y ``done`` (mismo formato que ChatResponse)
+    """
+    async def event_generator():
+        try:
+            context = await get_vector_context(request)
+            yield sse_event("context", {"context_used": context})
+            
+            history = await load_session_history(request)
+            new_messages = message_dicts(request.messages)
+            openrouter_messages = await history_compactor.compact(history + new_messages)
+            
+            tools = resolve_tools(request)
+            
+            async for chunk in openrouter_client.chat_completion_stream(
+                messages=openrouter_messages,
+                context=context,
+                tools=tools,
+                tool_choice=request.tool_choice,
+                temperature=request.temperature
+            ):
+                if chunk["type"] == "content":
+                    yield sse_event("token", {"delta": chunk["delta"]})
+                elif chunk["type"] == "tool_call":
+                    yield sse_event("tool_call", {"index": chunk["index"], "name": chunk["name"]})
+                elif chunk["type"] == "done":
+                    if chunk["finish_reason"] != "error":
+                        await save_session_turn(request, new_messages, [
+                            assistant_message(chunk["content"], chunk["tool_calls"])
+                        ])
+                    yield sse_event("done", ChatResponse(
+                        response=chunk["content"],
+                        context_used=context,
+                        tool_calls=chunk["tool_calls"],
+                        finish_reason=chunk["finish_reason"]
+                    ).dict())
+        except Exception as e:
+            logger.exception("Streaming request failed")
+            yield sse_event("error", {"detail": f"Error processing request: {str(e)}"})
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+@app.post("/chat/auto-tools/stream")
+async def chat_auto_tools_stream_endpoint(request: ChatRequest):
+    """
+    Variante en streaming de /chat/auto-tools con eventos de progreso
+    
+    Eventos: ``context``, ``iteration``, ``token``, ``tool_started``,
+    ``tool_finished`` y ``done`` (mismo formato que ChatResponse)
+    """
+    async def event_generator():
+        try:
+            max_iterations = 5  # Prevenir loops infinitos
+            tools_executed_log = []
+            tool_memo = {}  # Resultados de tools memoizados durante este request
+            
+            context = await get_vector_context(request)
+            yield sse_event("context", {"context_used": context})
+            
+            history = await load_session_history(request)
+            new_messages = message_dicts(request.messages)
+            messages = history + new_messages
+            tools = resolve_tools(request)
+            
+            for iteration in range(1, max_iterations + 1):
+                yield sse_event("iteration", {"iteration": iteration, "max_iterations": max_iterations})
+                
+                response_data = None
+                async for chunk in openrouter_client.chat_completion_stream(
+                    messages=await history_compactor.compact(messages),
+                    context=context if iteration == 1 else None,  # Context only on first call
+                    tools=tools,
+                    tool_choice=request.tool_choice,
+                    temperature=request.temperature
+                ):
+                    if chunk["type"] == "content":
+                        yield sse_event("token", {"delta": chunk["delta"]})
+                    elif chunk["type"] == "done":
+                        response_data = chunk
+                
+                finish_reason = response_data.get("finish_reason", "stop")
+                tool_calls = response_data.get("tool_calls")
+                content = response_data.get("content", "")
+                
+                # If no tool calls, we're done
+                if finish_reason != "tool_calls" or not tool_calls:
+                    if finish_reason != "error":
+                        messages.append(assistant_message(content))
+                        await save_session_turn(request, new_messages, messages[len(history) + len(new_messages):])
+                    yield sse_event("done", ChatResponse(
+                        response=content,
+                        context_used=context,
+                        tool_calls=None,
+                        finish_reason=finish_reason,
+                        iterations=iteration,
+                        tools_executed=tools_executed_log if tools_executed_log else None
+                    ).dict())
+                    return
+                
+                messages.append(assistant_message(content, tool_calls))
+                
+                for tool_call in tool_calls:
+                    yield sse_event("tool_started", {
+                        "tool_call_id": tool_call["id"],
+                        "tool_name": tool_call["function"]["name"]
+                    })
+                
+                # Ejecutar en paralelo y emitir tool_finished según van terminando
+                tasks = start_tool_calls(tool_calls, request.assistant_id, tool_memo)
+                for finished in asyncio.as_completed(tasks):
+                    run = await finished
+                    yield sse_event("tool_finished", {
+                        "tool_call_id": run["tool_call_id"],
+                        **tool_execution_log(run).dict()
+                    })
+                
+                # Mensajes y log en el orden original de tool_call_id
+                for task in tasks:
+                    run = task.result()
+                    tools_executed_log.append(tool_execution_log(run))
+                    messages.append(tool_message(run))
+            
+            # Max iterations reached: los tool rounds ejecutados quedan en la sesión
+            await save_session_turn(request, new_messages, messages[len(history) + len(new_messages):])
+            yield sse_event("done", ChatResponse(
+                response="Max iterations reached. Unable to complete request.",
+                context_used=context,
+                tool_calls=None,
+                finish_reason="length",
+                iterations=max_iterations,
+                tools_executed=tools_executed_log if tools_executed_log else None
+            ).dict())
+        except Exception as e:
+            logger.exception("Streaming request failed")
+            yield sse_event("error", {"detail": f"Error processing request: {str(e)}"})
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+# Registered tools
+@app.get("/tools")
+async def list_tools():
+    """Schemas de las tools registradas en el servidor (usables con ``tool_names``)"""
+    return {"tools": TOOL_REGISTRY.schemas()}
+
+# Conversation sessions
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """Historial guardado de una sesión (log append-only de mensajes)"""
+    messages = await session_store.load(session_id)
+    if not messages:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"session_id": session_id, "messages": messages}
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Borra una sesión y su historial"""
+    await session_store.delete(session_id)
+    return {"session_id": session_id, "status": "deleted"}
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -290,7 +675,7 @@ async def health_check():
 async def get_documents(limit: int = 10):
     """Get documents from vector store"""
     try:
-        docs = await vector_store.search_similar("", limit=limit)
+        docs = await vector_store.list_documents(limit=limit)
         return {"documents": docs}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -304,7 +689,43 @@ async def add_document(request: DocumentRequest):
     """Add a new document to vector store"""
     try:
         doc = await vector_store.insert_document(request.content, request.metadata)
-        return {"document": doc, "status": "created"}
+        return {"document": doc, "status": "created" if doc else "error"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class DocumentBatchRequest(BaseModel):
+    documents: List[DocumentRequest]
+
+@app.post("/documents/batch")
+async def add_documents_batch(request: DocumentBatchRequest):
+    """Add many documents: batched embeddings + bulk insert, with per-item status"""
+    try:
+        results = await vector_store.insert_documents(
+            [doc.dict() for doc in request.documents]
+        )
+        created = sum(1 for result in results if result["status"] == "created")
+        return {
+            "results": results,
+            "created": created,
+            "failed": len(results) - created
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/documents/import")
+async def import_documents(http_request: Request, skip: int = 0):
+    """
+    Importa un cuerpo NDJSON/JSONL ({content, metadata} por línea) en streaming
+    
+    El body se procesa a medida que llega (memoria acotada). ``checkpoint`` en la
+    respuesta es el número de registros importados; para reanudar, reenviar el
+    fichero con ``?skip=<checkpoint>``.
+    """
+    try:
+        return await import_records(
+            iter_jsonl_stream(http_request.stream(), skip=skip),
+            start_position=skip
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -334,19 +755,60 @@ async def debug_supabase_status():
         status = {
             "client_initialized": vector_store.client is not None,
             "supabase_url": Config.SUPABASE_URL[:30] + "..." if Config.SUPABASE_URL else None,
-            "supabase_key": Config.SUPABASE_KEY[:20] + "..." if Config.SUPABASE_KEY else None
+            "supabase_key_configured": bool(Config.SUPABASE_KEY)  # nunca exponer prefijos de claves
         }
         return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/debug/embedding-cache")
+async def debug_embedding_cache():
+    """Debug: Embedding cache hit/miss counters"""
+    return embedding_cache.stats()
+
+@app.get("/debug/response-cache")
+async def debug_response_cache():
+    """Debug: Exact-match LLM response cache metrics"""
+    return response_cache.stats()
+
+@app.get("/debug/history-compaction")
+async def debug_history_compaction():
+    """Estadísticas de la compactación del historial (truncados, resúmenes, tokens ahorrados)"""
+    return history_compactor.stats()
+
+@app.get("/debug/semantic-cache")
+async def debug_semantic_cache():
+    """Debug: Semantic response cache metrics"""
+    return semantic_cache.stats()
+
+@app.delete("/debug/semantic-cache")
+async def invalidate_semantic_cache(namespace: Optional[str] = None):
+    """Debug: Invalidate the semantic cache for an assistant_id / "meritxell" (or everything)"""
+    semantic_cache.invalidate(namespace)
+    return semantic_cache.stats()
+
 # Meritxell workflow endpoint
 class MeritxellRequest(BaseModel):
     input_text: str
+    session_id: Optional[str] = None  # Conversación multi-turno: el historial se guarda en el servidor
 
 class MeritxellResponse(BaseModel):
     output_text: str
     status: str = "success"
+    cached: Optional[bool] = None  # True si la respuesta viene del semantic cache
+    session_id: Optional[str] = None
+
+MERITXELL_CACHE_NAMESPACE = "meritxell"
+
+async def meritxell_question_embedding(request: MeritxellRequest) -> Optional[List[float]]:
+    """
+    Embedding para el semantic cache: solo en el primer turno de la sesión
+    """
+    if not Config.SEMANTIC_CACHE_ENABLED:
+        return None
+    if request.session_id and await session_has_history(request.session_id):
+        return None
+    return await vector_store.generate_embedding(request.input_text.strip())
 
 @app.post("/meritxell/chat", response_model=MeritxellResponse)
 async def meritxell_chat_endpoint(request: MeritxellRequest):
@@ -354,11 +816,23 @@ async def meritxell_chat_endpoint(request: MeritxellRequest):
     Endpoint para el workflow de Meritxell - Asistente para el Acord d'Associació Andorra-UE
     """
     try:
-        print(f"\n💬 Meritxell workflow iniciado")
-        print(f"📝 Input: {request.input_text[:100]}...")
+        # Semantic cache: las preguntas FAQ se repiten con otras palabras (solo primer turno de la sesión)
+        question_embedding = await meritxell_question_embedding(request)
+        if question_embedding:
+            cached = semantic_cache.lookup(MERITXELL_CACHE_NAMESPACE, question_embedding)
+            if cached:
+                logger.info("Meritxell semantic cache hit", extra={"similarity": round(cached["similarity"], 3)})
+                if request.session_id:
+                    await record_session_turn(request.session_id, request.input_text, cached["output_text"])
+                return MeritxellResponse(
+                    output_text=cached["output_text"],
+                    status="success",
+                    cached=True,
+                    session_id=request.session_id
+                )
         
         # Crear el input del workflow
-        workflow_input = WorkflowInput(input_as_text=request.input_text)
+        workflow_input = WorkflowInput(input_as_text=request.input_text, session_id=request.session_id)
         
         # Ejecutar el workflow
         result = await run_workflow(workflow_input)
@@ -366,17 +840,81 @@ async def meritxell_chat_endpoint(request: MeritxellRequest):
         # Extraer la respuesta según si pasó por guardrails o no
         output_text = result.get("output_text") if result else "Error: No se obtuvo respuesta"
         
-        print(f"✅ Respuesta generada: {output_text[:100]}...")
+        logger.info("Meritxell workflow completed", extra={"output_chars": len(output_text)})
+        
+        if question_embedding and result:
+            semantic_cache.store(MERITXELL_CACHE_NAMESPACE, question_embedding, {"output_text": output_text})
         
         return MeritxellResponse(
             output_text=output_text,
-            status="success"
+            status="success",
+            session_id=request.session_id
         )
         
     except Exception as e:
-        print(f"❌ Error en Meritxell workflow: {str(e)}")
+        logger.exception("Meritxell workflow failed")
         raise HTTPException(status_code=500, detail=f"Error processing Meritxell request: {str(e)}")
 
+@app.post("/meritxell/chat/stream")
+async def meritxell_chat_stream_endpoint(request: MeritxellRequest):
+    """
+    Variante en streaming de /meritxell/chat (Server-Sent Events)
+    
+    Eventos: ``token``, ``file_search`` (progreso de la búsqueda en documentos),
+    ``done`` (mismo formato que MeritxellResponse + ``truncated``) y ``error``.
+    La respuesta se corta a 2000 caracteres.
+    """
+    async def event_generator():
+        try:
+            question_embedding = await meritxell_question_embedding(request)
+            if question_embedding:
+                cached = semantic_cache.lookup(MERITXELL_CACHE_NAMESPACE, question_embedding)
+                if cached:
+                    if request.session_id:
+                        await record_session_turn(request.session_id, request.input_text, cached["output_text"])
+                    yield sse_event("done", {
+                        **MeritxellResponse(
+                            output_text=cached["output_text"],
+                            cached=True,
+                            session_id=request.session_id
+                        ).dict(),
+                        "truncated": False
+                    })
+                    return
+            
+            workflow_input = WorkflowInput(input_as_text=request.input_text, session_id=request.session_id)
+            stream = run_workflow_streamed(workflow_input)
+            try:
+                async for chunk in stream:
+                    if chunk["type"] == "delta":
+                        yield sse_event("token", {"delta": chunk["delta"]})
+                    elif chunk["type"] == "file_search":
+                        yield sse_event("file_search", {"status": chunk["status"]})
+                    elif chunk["type"] == "done":
+                        if question_embedding and chunk["output_text"] and not chunk["truncated"]:
+                            semantic_cache.store(MERITXELL_CACHE_NAMESPACE, question_embedding, {"output_text": chunk["output_text"]})
+                        yield sse_event("done", {
+                            **MeritxellResponse(
+                                output_text=chunk["output_text"],
+                                session_id=request.session_id
+                            ).dict(),
+                            "truncated": chunk["truncated"]
+                        })
+            finally:
+                # Cliente desconectado o error: cerrar el stream cancela el run del agente
+                await stream.aclose()
+        except Exception as e:
+            logger.exception("Streaming request failed")
+            yield sse_event("error", {"detail": f"Error processing Meritxell request: {str(e)}"})
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+@app.delete("/meritxell/sessions/{session_id}")
+async def delete_meritxell_session(session_id: str):
+    """Borra el historial de una sesión de Meritxell"""
+    await clear_session(session_id)
+    return {"session_id": session_id, "status": "deleted"}
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
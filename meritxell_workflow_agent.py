@@ -1,9 +1,16 @@
-from agents import FileSearchTool, Agent, ModelSettings, TResponseInputItem, Runner, RunConfig
+from agents import FileSearchTool, Agent, ModelSettings, TResponseInputItem, Runner, RunConfig, SQLiteSession
 from openai import AsyncOpenAI
 from types import SimpleNamespace
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import os
+import sqlite3
 # from guardrails.runtime import load_config_bundle, instantiate_guardrails, run_guardrails
 from openai.types.shared.reasoning import Reasoning
 from pydantic import BaseModel
+from config import Config
 
 # Tool definitions
 file_search = FileSearchTool(
@@ -126,8 +133,135 @@ agent = Agent(
 )
 
 
+# Límite de la respuesta fijado en las instrucciones ("no pot superar els 2000 caràcters")
+MAX_ANSWER_CHARS = 2000
+
+# Run config compartido por todas las ejecuciones del workflow
+run_config = RunConfig(trace_metadata={
+  "__trace_source__": "agent-builder",
+  "workflow_id": "wf_68e68038c80c8190ae6ba390cc4a96640604eec562b3126e"
+})
+
+
+class TrimmingSession(SQLiteSession):
+  """
+  SQLite session that only keeps the last ``max_turns`` user turns, with a TTL
+
+  Older items are pruned from disk after each write, so reads stay bounded;
+  trimming happens on user-message boundaries so tool calls, reasoning items
+  and their outputs are never split. Sessions idle for more than ``ttl_seconds``
+  start empty.
+  """
+
+  def __init__(self, session_id: str, db_path: str, max_turns: int, ttl_seconds: float = 86400):
+    super().__init__(session_id, db_path)
+    self.max_turns = max_turns
+    self.ttl_seconds = ttl_seconds
+
+  def _expired(self) -> bool:
+    with sqlite3.connect(str(self.db_path)) as db:
+      row = db.execute(
+        f"SELECT updated_at < datetime('now', ?) FROM {self.sessions_table} WHERE session_id = ?",
+        (f"-{int(self.ttl_seconds)} seconds", self.session_id)
+      ).fetchone()
+    return bool(row and row[0])
+
+  def _prune(self):
+    # Solo las filas candidatas a mensaje de usuario; se confirma el role al parsear
+    with sqlite3.connect(str(self.db_path)) as db:
+      rows = db.execute(
+        f"SELECT id, message_data FROM {self.messages_table} WHERE session_id = ? AND message_data LIKE ? ORDER BY id",
+        (self.session_id, '%"role": "user"%')
+      ).fetchall()
+      user_ids = [row_id for row_id, data in rows if json.loads(data).get("role") == "user"]
+      if len(user_ids) > self.max_turns:
+        db.execute(
+          f"DELETE FROM {self.messages_table} WHERE session_id = ? AND id < ?",
+          (self.session_id, user_ids[-self.max_turns])
+        )
+
+  async def get_items(self, limit: Optional[int] = None) -> List[TResponseInputItem]:
+    if await asyncio.to_thread(self._expired):
+      await self.clear_session()
+      return []
+    items = await super().get_items(limit)
+    user_turns = [i for i, item in enumerate(items) if isinstance(item, dict) and item.get("role") == "user"]
+    if self.max_turns > 0 and len(user_turns) > self.max_turns:
+      items = items[user_turns[-self.max_turns]:]
+    return items
+
+  async def add_items(self, items: List[TResponseInputItem]):
+    await super().add_items(items)
+    if self.max_turns > 0:
+      await asyncio.to_thread(self._prune)
+
+
+# Sesiones abiertas por session_id (LRU): el schema y el directorio se crean una vez por sesión, fuera del event loop
+_sessions: "OrderedDict[str, TrimmingSession]" = OrderedDict()
+
+
+def _open_session(session_id: str) -> TrimmingSession:
+  directory = os.path.dirname(Config.MERITXELL_SESSION_DB)
+  if directory:
+    os.makedirs(directory, exist_ok=True)
+  return TrimmingSession(
+    session_id,
+    Config.MERITXELL_SESSION_DB,
+    Config.MERITXELL_SESSION_MAX_TURNS,
+    ttl_seconds=Config.MERITXELL_SESSION_TTL
+  )
+
+
+async def get_session(session_id: str) -> TrimmingSession:
+  session = _sessions.get(session_id)
+  if session is None:
+    session = await asyncio.to_thread(_open_session, session_id)
+    # Otra coroutine pudo abrir la misma sesión mientras tanto
+    session = _sessions.setdefault(session_id, session)
+  _sessions.move_to_end(session_id)
+  while len(_sessions) > Config.MERITXELL_SESSION_CACHE_SIZE:
+    _sessions.popitem(last=False)
+  return session
+
+
+def _evict_expired_sessions() -> int:
+  if not os.path.exists(Config.MERITXELL_SESSION_DB):
+    return 0
+  cutoff = f"-{int(Config.MERITXELL_SESSION_TTL)} seconds"
+  with sqlite3.connect(Config.MERITXELL_SESSION_DB) as db:
+    try:
+      expired = [sid for (sid,) in db.execute(
+        "SELECT session_id FROM agent_sessions WHERE updated_at < datetime('now', ?)", (cutoff,)
+      ).fetchall()]
+    except sqlite3.OperationalError:  # tablas aún no creadas
+      return 0
+    db.executemany("DELETE FROM agent_messages WHERE session_id = ?", [(sid,) for sid in expired])
+    db.executemany("DELETE FROM agent_sessions WHERE session_id = ?", [(sid,) for sid in expired])
+  return len(expired)
+
+
+async def evict_expired_sessions() -> int:
+  """
+  Delete Meritxell sessions idle for more than MERITXELL_SESSION_TTL
+  """
+  return await asyncio.to_thread(_evict_expired_sessions)
+
+
+def user_message(text: str) -> TResponseInputItem:
+  return {
+    "role": "user",
+    "content": [
+      {
+        "type": "input_text",
+        "text": text
+      }
+    ]
+  }
+
+
 class WorkflowInput(BaseModel):
   input_as_text: str
+  session_id: Optional[str] = None
 
 
 # Main code entrypoint
@@ -136,16 +270,10 @@ async def run_workflow(workflow_input: WorkflowInput):
 
   }
   workflow = workflow_input.model_dump()
+  # Con session_id el SDK antepone el historial guardado y guarda los nuevos items
+  session = await get_session(workflow["session_id"]) if workflow["session_id"] else None
   conversation_history: list[TResponseInputItem] = [
-    {
-      "role": "user",
-      "content": [
-        {
-          "type": "input_text",
-          "text": workflow["input_as_text"]
-        }
-      ]
-    }
+    user_message(workflow["input_as_text"])
   ]
   
   # TODO: Implementar guardrails cuando tengamos la versión correcta
@@ -153,18 +281,82 @@ async def run_workflow(workflow_input: WorkflowInput):
   
   meritxell_result_temp = await Runner.run(
     meritxell,
-    input=[
+    # Con sesión se envía solo el turno nuevo como texto: el historial lo añade la sesión
+    input=workflow["input_as_text"] if session else [
       *conversation_history
     ],
-    run_config=RunConfig(trace_metadata={
-      "__trace_source__": "agent-builder",
-      "workflow_id": "wf_68e68038c80c8190ae6ba390cc4a96640604eec562b3126e"
-    })
+    run_config=run_config,
+    session=session
   )
 
-  conversation_history.extend([item.to_input_item() for item in meritxell_result_temp.new_items])
-
   meritxell_result = {
     "output_text": meritxell_result_temp.final_output_as(str)
   }
   return meritxell_result
+
+
+async def run_workflow_streamed(workflow_input: WorkflowInput) -> AsyncIterator[Dict[str, Any]]:
+  """
+  Streamed variant of run_workflow
+
+  Yields ``{"type": "delta", "delta"}`` text chunks, ``{"type": "file_search", "status"}``
+  progress events and a final ``{"type": "done", "output_text", "truncated"}``. Only
+  the first MAX_ANSWER_CHARS are forwarded; past the cap the run still completes so
+  the SDK saves the turn to the session. Closing the generator early (client gone)
+  cancels the run.
+  """
+  workflow = workflow_input.model_dump()
+  session = await get_session(workflow["session_id"]) if workflow["session_id"] else None
+  result = Runner.run_streamed(
+    meritxell,
+    input=workflow["input_as_text"] if session else [user_message(workflow["input_as_text"])],
+    run_config=run_config,
+    session=session
+  )
+
+  output_text = ""
+  truncated = False
+  try:
+    async for event in result.stream_events():
+      if event.type != "raw_response_event" or truncated:
+        continue
+      data_type = getattr(event.data, "type", "")
+      if data_type == "response.output_text.delta":
+        delta = event.data.delta[:MAX_ANSWER_CHARS - len(output_text)]
+        if delta:
+          output_text += delta
+          yield {"type": "delta", "delta": delta}
+        truncated = len(output_text) >= MAX_ANSWER_CHARS
+      elif data_type.startswith("response.file_search_call."):
+        # in_progress → searching → completed
+        yield {"type": "file_search", "status": data_type.rsplit(".", 1)[-1]}
+  finally:
+    if not result.is_complete:
+      result.cancel()
+
+  if result.final_output is not None:
+    final_text = str(result.final_output)
+    truncated = len(final_text) > MAX_ANSWER_CHARS
+    output_text = final_text[:MAX_ANSWER_CHARS]
+  yield {"type": "done", "output_text": output_text, "truncated": truncated}
+
+
+async def session_has_history(session_id: str) -> bool:
+  session = await get_session(session_id)
+  return bool(await session.get_items(limit=1))
+
+
+async def record_session_turn(session_id: str, input_text: str, output_text: str):
+  """
+  Añade a la sesión un turno servido sin ejecutar el agente (ej: semantic cache)
+  """
+  session = await get_session(session_id)
+  await session.add_items([
+    {"role": "user", "content": input_text},
+    {"role": "assistant", "content": output_text}
+  ])
+
+
+async def clear_session(session_id: str):
+  session = await get_session(session_id)
+  await session.clear_session()
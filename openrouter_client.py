@@ -1,114 +1,274 @@
 import httpx
-from typing import List, Dict, Any, Optional
+import json
+import logging
+import time
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from config import Config
+from response_cache import response_cache
+
+logger = logging.getLogger(__name__)
 
 class OpenRouterClient:
     def __init__(self):
         self.api_key = Config.OPENROUTER_API_KEY
         self.model = Config.OPENROUTER_MODEL
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = Config.OPENROUTER_BASE_URL
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        """
+        Build the long-lived pooled HTTP/2 client used for every OpenRouter call
+        """
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=Config.OPENROUTER_HTTP2,
+            timeout=httpx.Timeout(
+                Config.OPENROUTER_TIMEOUT,
+                connect=Config.OPENROUTER_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=Config.OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.OPENROUTER_KEEPALIVE_EXPIRY
+            )
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared client; created lazily so scripts outside the app lifespan still work
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+    
+    async def start(self):
+        """
+        Open the shared HTTP client (called from the FastAPI lifespan)
+        """
+        _ = self.client
+    
+    async def aclose(self):
+        """
+        Close the shared HTTP client and release pooled connections
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    def _build_request(
+        self,
+        messages: List[Dict[str, Any]],
+        context: str = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: str = "auto",
+        temperature: Optional[float] = None
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Build headers and payload for a chat completion request
+        """
+        # Add context if provided
+        if context:
+            system_message = {
+                "role": "system", 
+                "content": f"Context from vector store: {context}"
+            }
+            messages = [system_message] + messages
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost:8000",
+            "X-Title": "LLM Auto Backend"
+        }
+        
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": 1000,
+            "temperature": Config.OPENROUTER_TEMPERATURE if temperature is None else temperature
+        }
+        
+        # Add tools if provided
+        if tools:
+            payload["tools"] = tools
+            payload["tool_choice"] = tool_choice
+        
+        return headers, payload
     
     async def chat_completion(
         self, 
         messages: List[Dict[str, Any]], 
         context: str = None,
         tools: Optional[List[Dict[str, Any]]] = None,
-        tool_choice: str = "auto"
+        tool_choice: str = "auto",
+        temperature: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Send a chat completion request to OpenRouter with optional tools support
+        
+        Deterministic payloads (low temperature) are served from the exact-match response cache.
         """
         try:
-            # Add context if provided
-            if context:
-                system_message = {
-                    "role": "system", 
-                    "content": f"Context from vector store: {context}"
-                }
-                messages = [system_message] + messages
+            headers, payload = self._build_request(messages, context, tools, tool_choice, temperature)
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "http://localhost:8000",
-                "X-Title": "LLM Auto Backend"
-            }
+            cached = await response_cache.get(payload)
+            if cached is not None:
+                logger.debug("OpenRouter response served from cache")
+                return cached
             
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": 1000,
-                "temperature": 0.7
-            }
+            started = time.perf_counter()
+            response = await self.client.post(
+                "/chat/completions",
+                headers=headers,
+                json=payload
+            )
+            response.raise_for_status()
             
-            # Add tools if provided
-            if tools:
-                payload["tools"] = tools
-                payload["tool_choice"] = tool_choice
+            result = response.json()
+            message = result["choices"][0]["message"]
+            finish_reason = result["choices"][0].get("finish_reason", "stop")
             
-            print(f"\n🌐 OpenRouter Request Details:")
-            print(f"   📍 URL: {self.base_url}/chat/completions")
-            print(f"   🤖 Model: {self.model}")
-            print(f"   🔑 API Key: {self.api_key[:20]}..." if self.api_key else "   ❌ No API key")
-            print(f"   📊 Messages: {len(messages)} messages")
-            print(f"   🔧 Max tokens: {payload['max_tokens']}")
-            if tools:
-                print(f"   🛠️  Tools: {len(tools)} tools available")
+            # Extract content and tool calls
+            content = message.get("content", "")
+            tool_calls = message.get("tool_calls")
+            
+            logger.info("OpenRouter completion", extra={
+                "model": self.model,
+                "messages": len(payload["messages"]),
+                "tools": len(tools) if tools else 0,
+                "status": response.status_code,
+                "finish_reason": finish_reason,
+                "response_chars": len(content) if content else 0,
+                "tool_calls": len(tool_calls) if tool_calls else 0,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+            
+            result = {
+                "content": content,
+                "tool_calls": tool_calls,
+                "finish_reason": finish_reason
+            }
+            await response_cache.set(payload, result)
+            return result
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                
-                print(f"\n📡 OpenRouter Response:")
-                print(f"   📊 Status: {response.status_code}")
-                if response.status_code == 200:
-                    print(f"   ✅ Success!")
-                else:
-                    print(f"   ❌ Error response: {response.text[:200]}...")
-                
-                response.raise_for_status()
-                
-                result = response.json()
-                message = result["choices"][0]["message"]
-                finish_reason = result["choices"][0].get("finish_reason", "stop")
-                
-                # Extract content and tool calls
-                content = message.get("content", "")
-                tool_calls = message.get("tool_calls")
-                
-                print(f"   📝 Response length: {len(content) if content else 0} characters")
-                if content:
-                    print(f"   💬 Response preview: {content[:100]}...")
-                if tool_calls:
-                    print(f"   🔧 Tool calls: {len(tool_calls)}")
-                
-                return {
-                    "content": content,
-                    "tool_calls": tool_calls,
-                    "finish_reason": finish_reason
-                }
-                
         except httpx.HTTPStatusError as e:
-            print(f"\n❌ HTTP Error calling OpenRouter:")
-            print(f"   📊 Status: {e.response.status_code}")
-            print(f"   📝 Error: {e.response.text}")
+            logger.error("OpenRouter HTTP error", extra={
+                "status": e.response.status_code,
+                "error": e.response.text[:500]
+            })
             return {
                 "content": f"HTTP Error: {e.response.status_code} - {e.response.text}",
                 "tool_calls": None,
                 "finish_reason": "error"
             }
         except Exception as e:
-            print(f"\n❌ General Error calling OpenRouter:")
-            print(f"   🚨 Error: {e}")
+            logger.error("OpenRouter request failed: %s", e)
             return {
                 "content": f"Error: {str(e)}",
                 "tool_calls": None,
                 "finish_reason": "error"
             }
 
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        context: str = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: str = "auto",
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a chat completion from OpenRouter (``stream: true``)
+        
+        Yields ``{"type": "content", "delta": str}`` for every text delta,
+        ``{"type": "tool_call", "index": int, "name": str}`` when a tool call
+        starts, and a final ``{"type": "done", ...}`` event with the same shape
+        as ``chat_completion`` (content, tool_calls, finish_reason). Tool-call
+        deltas are assembled incrementally by index.
+        """
+        headers, payload = self._build_request(messages, context, tools, tool_choice, temperature)
+        payload["stream"] = True
+        
+        content_parts: List[str] = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        finish_reason = "stop"
+        
+        try:
+            async with self.client.stream(
+                "POST",
+                "/chat/completions",
+                headers=headers,
+                json=payload
+            ) as response:
+                if response.status_code != 200:
+                    error_text = (await response.aread()).decode(errors="replace")
+                    logger.error("OpenRouter HTTP error while streaming", extra={
+                        "status": response.status_code,
+                        "error": error_text[:500]
+                    })
+                    yield {
+                        "type": "done",
+                        "content": f"HTTP Error: {response.status_code} - {error_text}",
+                        "tool_calls": None,
+                        "finish_reason": "error"
+                    }
+                    return
+                
+                async for line in response.aiter_lines():
+                    # Ignorar keep-alives / comentarios SSE (": OPENROUTER PROCESSING")
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = json.loads(data)
+                    if not chunk.get("choices"):
+                        continue
+                    choice = chunk["choices"][0]
+                    delta = choice.get("delta") or {}
+                    
+                    if delta.get("content"):
+                        content_parts.append(delta["content"])
+                        yield {"type": "content", "delta": delta["content"]}
+                    
+                    for tool_delta in delta.get("tool_calls") or []:
+                        index = tool_delta.get("index", len(tool_calls))
+                        function_delta = tool_delta.get("function") or {}
+                        if index not in tool_calls:
+                            tool_calls[index] = {
+                                "id": tool_delta.get("id"),
+                                "type": tool_delta.get("type", "function"),
+                                "function": {"name": "", "arguments": ""}
+                            }
+                        call = tool_calls[index]
+                        if tool_delta.get("id"):
+                            call["id"] = tool_delta["id"]
+                        if function_delta.get("name"):
+                            call["function"]["name"] += function_delta["name"]
+                            yield {"type": "tool_call", "index": index, "name": call["function"]["name"]}
+                        if function_delta.get("arguments"):
+                            call["function"]["arguments"] += function_delta["arguments"]
+                    
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+            
+            yield {
+                "type": "done",
+                "content": "".join(content_parts),
+                "tool_calls": [tool_calls[i] for i in sorted(tool_calls)] or None,
+                "finish_reason": finish_reason
+            }
+            
+        except Exception as e:
+            logger.error("OpenRouter streaming failed: %s", e)
+            yield {
+                "type": "done",
+                "content": f"Error: {str(e)}",
+                "tool_calls": None,
+                "finish_reason": "error"
+            }
+
 # Global instance
 openrouter_client = OpenRouterClient()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_key(payload: Dict[str, Any]) -> str:
+    """
+    Hash of the canonicalized request payload (sorted keys, compact separators)
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return "llm:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUBackend:
+    """
+    In-process LRU backend with per-entry TTL
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.time() > expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        self._entries[key] = (time.time() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def close(self):
+        self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Backend for any Redis-compatible server (redis, valkey, a local stand-in...) via redis-py
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # opcional: solo se necesita con RESPONSE_CACHE_BACKEND=redis
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: float):
+        await self._client.set(key, value, ex=max(1, int(ttl_seconds)))
+
+    async def close(self):
+        await self._client.close()
+
+
+class ResponseCache:
+    """
+    Exact-match cache for deterministic chat completions
+
+    Only payloads with ``temperature <= max_temperature`` are cached, and only
+    successful responses are stored. The default OPENROUTER_TEMPERATURE (0.7) is above
+    the default threshold (0.3), so requests using the default temperature bypass the cache.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 600, max_temperature: float = 0.3, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def is_cacheable(self, payload: Dict[str, Any]) -> bool:
+        return (
+            self.enabled
+            and not payload.get("stream")
+            and payload.get("temperature", 1.0) <= self.max_temperature
+        )
+
+    async def get(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.is_cacheable(payload):
+            return None
+        try:
+            value = await self.backend.get(canonical_key(payload))
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Response cache read failed: %s", e)
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    async def set(self, payload: Dict[str, Any], result: Dict[str, Any]):
+        if not self.is_cacheable(payload) or result.get("finish_reason") == "error":
+            return
+        try:
+            await self.backend.set(canonical_key(payload), json.dumps(result), self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Response cache write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl_seconds,
+            "max_temperature": self.max_temperature,
+            # False: los requests con la temperatura por defecto nunca se cachean
+            "default_temperature_cacheable": Config.OPENROUTER_TEMPERATURE <= self.max_temperature,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    async def close(self):
+        await self.backend.close()
+
+
+def build_backend():
+    if Config.RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            return RedisBackend(Config.RESPONSE_CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed, using in-memory response cache")
+    return MemoryLRUBackend(max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+# Global instance
+response_cache = ResponseCache(
+    build_backend(),
+    ttl_seconds=Config.RESPONSE_CACHE_TTL,
+    max_temperature=Config.RESPONSE_CACHE_MAX_TEMPERATURE,
+    enabled=Config.RESPONSE_CACHE_ENABLED
+)
@@ -0,0 +1,108 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+
+class SemanticCache:
+    """
+    Answer cache looked up by question-embedding similarity, one namespace per assistant
+
+    A hit is the most similar stored question with cosine similarity above
+    ``threshold`` that has not expired. Namespaces are invalidated when the
+    documents of that assistant change.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def _namespace(self, namespace: str) -> Dict[str, Any]:
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = {"matrix": None, "entries": []}
+        return self._namespaces[namespace]
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop_expired(self, space: Dict[str, Any]):
+        now = time.time()
+        keep = [i for i, entry in enumerate(space["entries"]) if now - entry["created_at"] <= self.ttl_seconds]
+        if len(keep) == len(space["entries"]):
+            return
+        space["entries"] = [space["entries"][i] for i in keep]
+        space["matrix"] = space["matrix"][keep] if keep else None
+
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        space = self._namespaces.get(namespace)
+        if space is not None:
+            self._drop_expired(space)
+        if space is None or space["matrix"] is None:
+            self.misses += 1
+            return None
+
+        scores = space["matrix"] @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry = space["entries"][best]
+        return {**entry["value"], "similarity": float(scores[best])}
+
+    def store(self, namespace: str, embedding: List[float], value: Dict[str, Any]):
+        space = self._namespace(namespace)
+        vector = self._normalize(embedding)[None, :]
+        space["entries"].append({"created_at": time.time(), "value": value})
+        space["matrix"] = vector if space["matrix"] is None else np.vstack([space["matrix"], vector])
+        if len(space["entries"]) > self.max_entries:
+            overflow = len(space["entries"]) - self.max_entries
+            space["entries"] = space["entries"][overflow:]
+            space["matrix"] = space["matrix"][overflow:]
+        self.stores += 1
+
+    def invalidate(self, namespace: Optional[str] = None):
+        """
+        Drop one namespace or, with ``None``, the whole cache
+
+        Sub-namespaces (``"<namespace>:..."``, e.g. per-request options of an assistant) go too.
+        """
+        if namespace is None:
+            self._namespaces.clear()
+        else:
+            for name in [n for n in self._namespaces if n == namespace or n.startswith(f"{namespace}:")]:
+                del self._namespaces[name]
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "namespaces": {name: len(space["entries"]) for name, space in self._namespaces.items()},
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Global instance
+semantic_cache = SemanticCache(
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=Config.SEMANTIC_CACHE_TTL,
+    max_entries=Config.SEMANTIC_CACHE_MAX_ENTRIES
+)
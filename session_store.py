@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+
+class MemorySessionStore:
+    """
+    In-process session store: append-only message log per session_id, LRU-bounded with TTL
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 86400):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def load(self, session_id: str) -> List[Dict[str, Any]]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        if time.time() - session["updated_at"] > self.ttl_seconds:
+            del self._sessions[session_id]
+            return []
+        self._sessions.move_to_end(session_id)
+        return list(session["messages"])
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]):
+        session = self._sessions.get(session_id)
+        if session is None or time.time() - session["updated_at"] > self.ttl_seconds:
+            session = {"messages": [], "updated_at": 0.0}
+            self._sessions[session_id] = session
+        session["messages"].extend(messages)
+        session["updated_at"] = time.time()
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+    async def evict_expired(self) -> int:
+        now = time.time()
+        expired = [sid for sid, s in self._sessions.items() if now - s["updated_at"] > self.ttl_seconds]
+        for session_id in expired:
+            del self._sessions[session_id]
+        return len(expired)
+
+    async def close(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Local SQLite session store (survives restarts); the message log is append-only
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Open connection (callers hold ``_lock``); reopened lazily after close(), e.g. a second lifespan
+        """
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, updated_at REAL);"
+                "CREATE TABLE IF NOT EXISTS session_messages ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, message TEXT);"
+                "CREATE INDEX IF NOT EXISTS session_messages_session_idx ON session_messages (session_id, seq);"
+            )
+            self._db.commit()
+        return self._db
+
+    def _load(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_seconds:
+                return []
+            rows = db.execute(
+                "SELECT message FROM session_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [json.loads(message) for (message,) in rows]
+
+    def _append(self, session_id: str, messages: List[Dict[str, Any]]):
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is not None and time.time() - row[0] > self.ttl_seconds:
+                db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            db.executemany(
+                "INSERT INTO session_messages (session_id, message) VALUES (?, ?)",
+                [(session_id, json.dumps(message, ensure_ascii=False)) for message in messages]
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, updated_at) VALUES (?, ?)",
+                (session_id, time.time())
+            )
+            db.commit()
+
+    def _delete(self, session_id: str):
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            db.commit()
+
+    def _evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            db = self._conn()
+            expired = [sid for (sid,) in db.execute(
+                "SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,)
+            ).fetchall()]
+            db.executemany("DELETE FROM session_messages WHERE session_id = ?", [(sid,) for sid in expired])
+            db.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+            db.commit()
+        return len(expired)
+
+    async def load(self, session_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._load, session_id)
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]):
+        await asyncio.to_thread(self._append, session_id, messages)
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self._delete, session_id)
+
+    async def evict_expired(self) -> int:
+        return await asyncio.to_thread(self._evict_expired)
+
+    async def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def build_session_store():
+    if Config.SESSION_STORE_BACKEND == "sqlite":
+        return SQLiteSessionStore(Config.SESSION_STORE_PATH, ttl_seconds=Config.SESSION_TTL)
+    return MemorySessionStore(max_sessions=Config.SESSION_MAX_SESSIONS, ttl_seconds=Config.SESSION_TTL)
+
+
+# Global instance
+session_store = build_session_store()
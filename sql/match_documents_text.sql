@@ -0,0 +1,46 @@
+-- Búsqueda léxica server-side para el fallback de SupabaseVectorStore.search_text
+-- Ejecutar una vez en el SQL editor de Supabase.
+--
+-- Combina full-text search (tsvector, diccionario 'simple' porque el corpus es
+-- multilingüe: català, castellano, français, english, português) con pg_trgm
+-- para tolerar errores tipográficos. Devuelve el top-k ya ordenado, así que el
+-- coste ya no depende del tamaño de la tabla en el backend.
+
+create extension if not exists pg_trgm;
+
+create index if not exists documents_content_fts_idx
+  on documents using gin (to_tsvector('simple', content));
+
+create index if not exists documents_content_trgm_idx
+  on documents using gin (content gin_trgm_ops);
+
+create or replace function match_documents_text (
+  query_text text,
+  match_count int default 5,
+  filter jsonb default '{}'
+) returns table (
+  id bigint,
+  content text,
+  metadata jsonb,
+  similarity float
+)
+language sql stable
+as $$
+  with q as (
+    select websearch_to_tsquery('simple', query_text) as tsq
+  )
+  select
+    d.id,
+    d.content,
+    d.metadata,
+    (ts_rank_cd(to_tsvector('simple', d.content), q.tsq)
+      + word_similarity(query_text, d.content))::float as similarity
+  from documents d, q
+  where d.metadata @> filter
+    and (
+      to_tsvector('simple', d.content) @@ q.tsq
+      or query_text <% d.content
+    )
+  order by similarity desc
+  limit match_count;
+$$;
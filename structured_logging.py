@@ -0,0 +1,145 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from config import Config
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+request_sampled_var: ContextVar[bool] = ContextVar("request_sampled", default=True)
+
+# Atributos estándar de LogRecord: todo lo demás viene de ``extra=`` y se emite como campo
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach the request id and apply per-request sampling
+
+    Runs in the caller's context (before the record is queued), where the request
+    contextvars are set. Records below WARNING from unsampled requests are dropped.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return record.levelno >= logging.WARNING or request_sampled_var.get()
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _STANDARD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, logger, msg, request_id and the ``extra`` fields
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        entry.update(_extra_fields(record))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Human-readable line for local development: ``time level logger [request_id] msg key=value``
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        request_id = getattr(record, "request_id", None)
+        fields = " ".join(f"{key}={value}" for key, value in _extra_fields(record).items())
+        line = f"{timestamp} {record.levelname:<7} {record.name}"
+        if request_id:
+            line += f" [{request_id[:8]}]"
+        line += f" {record.getMessage()}"
+        return f"{line} {fields}" if fields else line
+
+
+def setup_logging(level: str = None, fmt: str = None):
+    """
+    Route all logging through a QueueHandler; a background QueueListener does the stdout writes
+
+    Idempotent. The event loop only pays for the level check, the filter and a queue put.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if (fmt or Config.LOG_FORMAT) == "json" else TextFormatter())
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel((level or Config.LOG_LEVEL).upper())
+    # httpx/httpcore loguean cada request a INFO: solo avisos y errores
+    for noisy in ("httpx", "httpcore", "hpack", "openai", "postgrest"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Flush pending records and stop the background listener
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _valid_request_id(value: str) -> bool:
+    return 0 < len(value) <= 128 and value.isprintable()
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware: per-request correlation id (``X-Request-ID``, generated if missing or
+    invalid) and the sampling decision, echoed back in the response headers
+    """
+
+    def __init__(self, app, sample_rate: float = None):
+        self.app = app
+        self.sample_rate = Config.LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming if _valid_request_id(incoming) else uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        sampled_token = request_sampled_var.set(self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(id_token)
+            request_sampled_var.reset(sampled_token)
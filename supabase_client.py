@@ -1,238 +1,396 @@
 from supabase import create_client, Client
 from config import Config
-import openai
+from embedding_cache import embedding_cache
+from vector_index import LocalVectorIndex
+from chunking import chunk_documents
+from semantic_cache import semantic_cache
+from openai import AsyncOpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import asyncio
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SupabaseVectorStore:
     def __init__(self):
+        self._embedding_client: Optional[AsyncOpenAI] = None
+        self.local_indexes: Dict[str, LocalVectorIndex] = {}
+        self._local_index_task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
         if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
-            print("⚠️  Supabase credentials not configured. Please check your .env file.")
+            logger.warning("Supabase credentials not configured. Please check your .env file.")
             self.client = None
             return
         try:
             self.client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
-            print("✅ Supabase client initialized successfully")
+            logger.info("Supabase client initialized successfully")
         except Exception as e:
-            print(f"❌ Error initializing Supabase client: {e}")
-            print("⚠️  Running in demo mode without Supabase")
+            logger.error("Error initializing Supabase client, running in demo mode without Supabase: %s", e)
             self.client = None
     
+    @property
+    def embedding_client(self) -> AsyncOpenAI:
+        """
+        Shared async OpenAI client (pooled connections) used for embeddings
+        """
+        if self._embedding_client is None:
+            self._embedding_client = AsyncOpenAI(
+                api_key=Config.OPENAI_API_KEY,
+                base_url=Config.OPENAI_BASE_URL,
+                timeout=Config.EMBEDDING_TIMEOUT,
+                max_retries=Config.EMBEDDING_MAX_RETRIES
+            )
+        return self._embedding_client
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Bounded pool for supabase-py's blocking .execute() calls, so they don't block the
+        event loop and PostgREST round-trips overlap; recreated after aclose()
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=Config.SUPABASE_MAX_WORKERS,
+                thread_name_prefix="supabase"
+            )
+        return self._executor
+    
+    async def aclose(self):
+        """
+        Close the shared embedding client and the query thread pool (called from the FastAPI lifespan)
+        """
+        if self._local_index_task is not None:
+            self._local_index_task.cancel()
+            self._local_index_task = None
+        if self._embedding_client is not None:
+            await self._embedding_client.close()
+            self._embedding_client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    async def _execute(self, query):
+        """
+        Run a supabase-py query builder's blocking execute() on the thread pool
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, query.execute)
+    
+    async def sync_local_index(self, assistant_id: str, table_name: str = "documents", full: bool = False) -> Optional[LocalVectorIndex]:
+        """
+        Load (or incrementally extend) the in-process vector index for an assistant
+        
+        Incremental syncs only fetch rows with an id above the last one seen;
+        ``full=True`` rebuilds the index from scratch (picks up updates/deletes).
+        """
+        if not self.client:
+            return None
+        
+        index = self.local_indexes.get(assistant_id)
+        if index is None or full:
+            index = LocalVectorIndex(assistant_id, use_hnsw=Config.LOCAL_INDEX_HNSW)
+        
+        try:
+            while True:
+                query_builder = (
+                    self.client.table(table_name)
+                    .select("id, content, metadata, embedding")
+                    .eq("metadata->>assistantId", assistant_id)
+                    .order("id")
+                    .limit(Config.LOCAL_INDEX_PAGE_SIZE)
+                )
+                if index.last_id is not None:
+                    query_builder = query_builder.gt("id", index.last_id)
+                response = await self._execute(query_builder)
+                rows = response.data or []
+                index.add(rows)
+                
+                if len(index) > Config.LOCAL_INDEX_MAX_ROWS:
+                    logger.warning("Local index exceeds LOCAL_INDEX_MAX_ROWS, using Supabase only", extra={
+                        "assistant_id": assistant_id,
+                        "max_rows": Config.LOCAL_INDEX_MAX_ROWS
+                    })
+                    self.local_indexes.pop(assistant_id, None)
+                    return None
+                if len(rows) < Config.LOCAL_INDEX_PAGE_SIZE:
+                    break
+        except Exception as e:
+            logger.error("Error syncing local index: %s", e, extra={"assistant_id": assistant_id})
+            return self.local_indexes.get(assistant_id)
+        
+        self.local_indexes[assistant_id] = index
+        return index
+    
+    async def _local_index_sync_loop(self):
+        """
+        Incremental sync every LOCAL_INDEX_SYNC_INTERVAL; every LOCAL_INDEX_FULL_SYNC_EVERY
+        ticks a full rebuild, since incremental syncs never see updated or deleted rows
+        """
+        tick = 0
+        while True:
+            await asyncio.sleep(Config.LOCAL_INDEX_SYNC_INTERVAL)
+            tick += 1
+            full = Config.LOCAL_INDEX_FULL_SYNC_EVERY > 0 and tick % Config.LOCAL_INDEX_FULL_SYNC_EVERY == 0
+            for assistant_id in list(self.local_indexes):
+                await self.sync_local_index(assistant_id, full=full)
+    
+    async def start_local_indexes(self):
+        """
+        Load local indexes for the configured assistants and start the periodic sync (FastAPI lifespan)
+        """
+        if not Config.LOCAL_INDEX_ENABLED or not self.client:
+            return
+        for assistant_id in Config.LOCAL_INDEX_ASSISTANTS:
+            index = await self.sync_local_index(assistant_id, full=True)
+            if index is not None:
+                logger.info("Local vector index loaded", extra={"assistant_id": assistant_id, "documents": len(index)})
+        self._local_index_task = asyncio.create_task(self._local_index_sync_loop())
+    
     async def generate_embedding(self, text: str):
         """
         Generate embedding for text using OpenAI API
         """
         try:
             if not Config.OPENAI_API_KEY:
-                print("⚠️  OpenAI API key not configured for embeddings")
+                logger.warning("OpenAI API key not configured for embeddings")
                 return None
-                
-            client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
             
-            response = client.embeddings.create(
-                model="text-embedding-3-small",
+            if Config.EMBEDDING_CACHE_ENABLED:
+                cached = await embedding_cache.get(text, Config.EMBEDDING_MODEL)
+                if cached is not None:
+                    return cached
+            
+            response = await self.embedding_client.embeddings.create(
+                model=Config.EMBEDDING_MODEL,
                 input=text
             )
+            embedding = response.data[0].embedding
+            
+            if Config.EMBEDDING_CACHE_ENABLED:
+                await embedding_cache.set(text, Config.EMBEDDING_MODEL, embedding)
             
-            return response.data[0].embedding
+            return embedding
             
         except Exception as e:
-            print(f"   ❌ Error generating embedding: {e}")
+            logger.error("Error generating embedding: %s", e)
             return None
     
+    async def generate_embeddings(self, texts: List[str], cache_results: bool = True) -> List[Optional[List[float]]]:
+        """
+        Generate embeddings for many texts with a single OpenAI call (cached texts are skipped)
+        
+        Returns one embedding per input, in order; entries are None when the call fails.
+        ``cache_results=False`` keeps new embeddings out of the cache (ingestion: document
+        chunks are rarely embedded twice and would only evict query embeddings).
+        """
+        if not texts:
+            return []
+        if not Config.OPENAI_API_KEY:
+            logger.warning("OpenAI API key not configured for embeddings")
+            return [None] * len(texts)
+        
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        if Config.EMBEDDING_CACHE_ENABLED:
+            pending = []
+            for i, text in enumerate(texts):
+                embeddings[i] = await embedding_cache.get(text, Config.EMBEDDING_MODEL)
+                if embeddings[i] is None:
+                    pending.append(i)
+        if not pending:
+            return embeddings
+        
+        try:
+            response = await self.embedding_client.embeddings.create(
+                model=Config.EMBEDDING_MODEL,
+                input=[texts[i] for i in pending]
+            )
+            for item in response.data:
+                i = pending[item.index]
+                embeddings[i] = item.embedding
+                if Config.EMBEDDING_CACHE_ENABLED and cache_results:
+                    await embedding_cache.set(texts[i], Config.EMBEDDING_MODEL, item.embedding)
+        except Exception as e:
+            logger.error("Error generating batch embeddings: %s", e, extra={"texts": len(pending)})
+        
+        return embeddings
+    
     async def search_similar_vector(self, query: str, table_name: str = "documents", limit: int = 5, assistant_id: str = None):
         """
         Search for similar documents using vector similarity with Supabase's native vector search
+        
+        Vector stage only: returns an empty list when no embedding can be generated
+        or the match_documents RPC finds nothing (no table-scan fallback here).
         """
         if not self.client:
-            print("⚠️  Supabase client not initialized. Returning empty results.")
+            logger.warning("Supabase client not initialized. Returning empty results.")
             return []
         
-        print(f"\n🔍 Vector Similarity Search:")
-        print(f"   📋 Table: {table_name}")
-        print(f"   🔍 Query: {query[:50]}...")
-        print(f"   📊 Limit: {limit}")
-        
         try:
             # Generate embedding for the query
-            print(f"   🚀 Generating embedding for query...")
             query_embedding = await self.generate_embedding(query)
             
-            if query_embedding:
-                print(f"   ✅ Generated embedding with {len(query_embedding)} dimensions")
-                
-                try:
-                    # Use the RPC function with real embedding
-                    response = self.client.rpc(
-                        'match_documents',
-                        {
-                            'query_embedding': query_embedding,
-                            'match_count': limit,
-                            'filter': {'assistantId': assistant_id} if assistant_id else {}
-                        }
-                    ).execute()
-                    
-                    if response.data:
-                        print(f"   ✅ Vector search successful!")
-                        for i, doc in enumerate(response.data):
-                            content = doc.get("content", "")
-                            similarity = doc.get("similarity", doc.get("score", 0))
-                            print(f"   📄 Doc {i+1} (similarity: {similarity:.3f}): {content[:50]}...")
-                        return response.data
-                    else:
-                        print(f"   📭 No similar documents found via vector search")
-                        
-                except Exception as rpc_error:
-                    print(f"   ⚠️  RPC function failed: {rpc_error}")
-                    print(f"   🔄 Falling back to text-based similarity...")
-            else:
-                print(f"   ⚠️  Could not generate embedding, falling back to text search...")
+            if not query_embedding:
+                logger.warning("Could not generate query embedding, skipping vector search")
+                return []
             
-            # Fallback: get all documents and do text-based similarity
-            print(f"   🔍 Checking database for documents...")
-            query_builder = self.client.table(table_name).select("*")
-            if assistant_id:
-                query_builder = query_builder.eq("assistant_id", assistant_id)
-            response = query_builder.execute()
+            # Local in-process index first (Supabase remains the source of truth)
+            local_index = self.local_indexes.get(assistant_id) if assistant_id else None
+            if local_index is not None and table_name == "documents":
+                # Búsqueda NumPy/HNSW fuera del event loop
+                local_docs = await asyncio.to_thread(local_index.search, query_embedding, limit)
+                if local_docs:
+                    logger.debug("Local index answered", extra={"results": len(local_docs)})
+                    return local_docs
             
-            print(f"   📊 Database query returned: {len(response.data) if response.data else 0} documents")
+            # Use the RPC function with real embedding
+            response = await self._execute(self.client.rpc(
+                'match_documents',
+                {
+                    'query_embedding': query_embedding,
+                    'match_count': limit,
+                    'filter': {'assistantId': assistant_id} if assistant_id else {}
+                }
+            ))
+            
+            return response.data or []
             
-            if response.data:
-                print(f"   📊 Found {len(response.data)} documents, using text-based similarity...")
-                # Show first few documents for debugging
-                for i, doc in enumerate(response.data[:3]):
-                    content = doc.get("content", "")
-                    print(f"   📄 Doc {i+1}: {content[:50]}...")
-                else:
-                    print(f"   📭 No documents found in database")
-                    print(f"   💡 Tip: Add some documents first using POST /documents endpoint")
-                
-                # Do text-based similarity scoring
-                scored_docs = []
-                query_lower = query.lower()
-                query_words = [word for word in query_lower.split() if len(word) > 2]
-                
-                for doc in response.data:
-                    content = doc.get("content", "").lower()
-                    
-                    # Calculate similarity score
-                    score = 0
-                    if query_lower in content:
-                        score += 1.0  # Exact phrase match
-                    
-                    word_matches = sum(1 for word in query_words if word in content)
-                    if word_matches > 0:
-                        score += word_matches / len(query_words) * 0.5  # Word matches
-                    
-                    if score > 0:
-                        doc['similarity'] = score
-                        scored_docs.append(doc)
-                
-                # Sort by similarity score
-                scored_docs.sort(key=lambda x: x.get('similarity', 0), reverse=True)
-                
-                print(f"   ✅ Text similarity found {len(scored_docs)} relevant documents")
-                for i, doc in enumerate(scored_docs[:limit]):
-                    content = doc.get("content", "")
-                    similarity = doc.get("similarity", 0)
-                    print(f"   📄 Doc {i+1} (similarity: {similarity:.3f}): {content[:50]}...")
-                
-                return scored_docs[:limit]
-            else:
-                print(f"   📭 No documents found in database")
-                print(f"   💡 Tip: Add some documents first using POST /documents endpoint")
-                return []
-                
         except Exception as e:
-            print(f"   ❌ Vector search failed: {e}")
+            logger.error("Vector search failed: %s", e)
             return []
-
-    async def search_similar(self, query: str, table_name: str = "documents", limit: int = 5, assistant_id: str = None):
+    
+    async def search_text(self, query: str, table_name: str = "documents", limit: int = 5, assistant_id: str = None):
         """
-        Search for similar documents using vector similarity with fallback to text search
+        Lexical search pushed into Postgres (full-text + pg_trgm RPC, see sql/match_documents_text.sql)
+        
+        The database returns the ranked top-k, so cost no longer grows with table size.
         """
         if not self.client:
-            print("⚠️  Supabase client not initialized. Returning empty results.")
+            logger.warning("Supabase client not initialized. Returning empty results.")
             return []
         
-        print(f"\n🔍 Document Search:")
-        print(f"   📋 Table: {table_name}")
-        print(f"   🔍 Query: {query[:50]}...")
-        print(f"   📊 Limit: {limit}")
+        if not query.strip():
+            return []
         
-        # First try vector search
         try:
-            print(f"   🚀 Attempting vector similarity search...")
-            vector_results = await self.search_similar_vector(query, table_name, limit, assistant_id)
+            response = await self._execute(self.client.rpc(
+                Config.SUPABASE_TEXT_SEARCH_FUNCTION,
+                {
+                    'query_text': query,
+                    'match_count': limit,
+                    'filter': {'assistantId': assistant_id} if assistant_id else {}
+                }
+            ))
             
-            if vector_results:
-                print(f"   ✅ Vector search successful, returning {len(vector_results)} results")
-                return vector_results
-            else:
-                print(f"   📭 Vector search returned no results, trying fallback...")
-                
-        except Exception as vector_error:
-            print(f"   ⚠️  Vector search failed: {vector_error}")
-            print(f"   🔄 Falling back to text search...")
+            return response.data or []
+            
+        except Exception as e:
+            logger.error("Text search failed: %s", e)
+            return []
+    
+    async def list_documents(self, table_name: str = "documents", limit: int = 10, assistant_id: str = None):
+        """
+        List documents without ranking (bounded by limit)
+        """
+        if not self.client:
+            logger.warning("Supabase client not initialized. Returning empty results.")
+            return []
         
-        # Fallback to text search
         try:
-            print(f"   🔍 Performing text-based search...")
             query_builder = self.client.table(table_name).select("*")
             if assistant_id:
                 query_builder = query_builder.eq("assistant_id", assistant_id)
-            response = query_builder.execute()
-            
-            if not response.data:
-                print(f"   📭 No documents found in database")
-                return []
-            
-            print(f"   📊 Found {len(response.data)} total documents, filtering by text similarity...")
-            
-            # Simple text matching as fallback
-            filtered_docs = []
-            query_lower = query.lower()
-            query_words = [word for word in query_lower.split() if len(word) > 2]
-            
-            for doc in response.data:
-                content = doc.get("content", "").lower()
-                
-                # Check for exact phrase match
-                if query_lower in content:
-                    filtered_docs.append(doc)
-                    print(f"   ✅ Phrase match: {content[:50]}...")
-                    continue
-                
-                # Check for word matches
-                word_matches = sum(1 for word in query_words if word in content)
-                if word_matches > 0:
-                    # Add similarity score for ranking
-                    doc['text_similarity'] = word_matches / len(query_words)
-                    filtered_docs.append(doc)
-                    print(f"   ✅ Word match ({word_matches}/{len(query_words)}): {content[:50]}...")
-            
-            # Sort by similarity if we have scores
-            if filtered_docs and 'text_similarity' in filtered_docs[0]:
-                filtered_docs.sort(key=lambda x: x.get('text_similarity', 0), reverse=True)
-            
-            print(f"   🎯 Text search found {len(filtered_docs)} documents")
-            return filtered_docs[:limit]
-            
-        except Exception as fallback_error:
-            print(f"   ❌ Text search also failed: {fallback_error}")
+            response = await self._execute(query_builder.limit(limit))
+            return response.data or []
+        except Exception as e:
+            logger.error("Error listing documents: %s", e)
             return []
     
+    @staticmethod
+    def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], limit: int, k: int = 60) -> List[Dict[str, Any]]:
+        """
+        Fuse ranked result lists with reciprocal-rank fusion: score = sum(1 / (k + rank))
+        """
+        scores: Dict[Any, float] = {}
+        docs: Dict[Any, Dict[str, Any]] = {}
+        for results in result_lists:
+            for rank, doc in enumerate(results, start=1):
+                key = doc.get("id") or doc.get("content", "")
+                scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+                docs.setdefault(key, doc)
+        
+        ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+        fused = []
+        for key in ranked:
+            doc = dict(docs[key])
+            doc["rrf_score"] = scores[key]
+            fused.append(doc)
+        return fused
+    
+    async def retrieve(self, query: str, table_name: str = "documents", limit: int = 5, assistant_id: str = None, mode: str = "fallback") -> Dict[str, Any]:
+        """
+        Retrieval pipeline
+        
+        - ``fallback`` (default): vector, then lexical, then empty; each stage runs at most once
+        - ``hybrid``: vector and lexical run concurrently and are fused with reciprocal-rank fusion
+        
+        Returns ``{"stage": "vector" | "lexical" | "hybrid" | "empty", "documents": [...]}``.
+        """
+        if not self.client:
+            logger.warning("Supabase client not initialized. Returning empty results.")
+            return {"stage": "empty", "documents": []}
+        
+        if mode == "hybrid":
+            candidates = limit * Config.HYBRID_CANDIDATE_MULTIPLIER
+            vector_docs, text_docs = await asyncio.gather(
+                self.search_similar_vector(query, table_name, candidates, assistant_id),
+                self.search_text(query, table_name, candidates, assistant_id)
+            )
+            documents = self.reciprocal_rank_fusion([vector_docs, text_docs], limit, k=Config.HYBRID_RRF_K)
+            logger.debug("Retrieval finished", extra={
+                "mode": mode,
+                "vector_results": len(vector_docs),
+                "lexical_results": len(text_docs),
+                "results": len(documents)
+            })
+            if documents:
+                return {"stage": "hybrid", "documents": documents}
+            return {"stage": "empty", "documents": []}
+        
+        stages = (
+            ("vector", self.search_similar_vector),
+            ("lexical", self.search_text),
+        )
+        for stage, search in stages:
+            documents = await search(query, table_name, limit, assistant_id)
+            if documents:
+                logger.debug("Retrieval finished", extra={"mode": mode, "stage": stage, "results": len(documents)})
+                return {"stage": stage, "documents": documents}
+        
+        return {"stage": "empty", "documents": []}
+    
+    async def search_similar(self, query: str, table_name: str = "documents", limit: int = 5, assistant_id: str = None, mode: str = "fallback"):
+        """
+        Search for similar documents using vector similarity with fallback to text search
+        (or hybrid fusion of both when ``mode="hybrid"``)
+        """
+        result = await self.retrieve(query, table_name, limit, assistant_id, mode)
+        return result["documents"]
+    
     async def get_document_by_id(self, doc_id: str, table_name: str = "documents"):
         """
         Get a specific document by ID
         """
         if not self.client:
-            print("Supabase client not initialized.")
+            logger.warning("Supabase client not initialized.")
             return None
         try:
-            response = self.client.table(table_name).select("*").eq("id", doc_id).execute()
+            response = await self._execute(self.client.table(table_name).select("*").eq("id", doc_id))
             return response.data[0] if response.data else None
         except Exception as e:
-            print(f"Error getting document from Supabase: {e}")
+            logger.error("Error getting document from Supabase: %s", e)
             return None
     
     async def list_tables(self):
@@ -240,24 +398,21 @@ class SupabaseVectorStore:
         List all available tables in the database
         """
         if not self.client:
-            print("⚠️  Supabase client not initialized.")
+            logger.warning("Supabase client not initialized.")
             return []
         
         try:
             # This is a simple way to check tables - we'll try to query information_schema
-            print(f"\n📋 Checking available tables...")
-            
             # Try to get tables from information_schema
-            response = self.client.rpc('get_tables_info').execute()
+            response = await self._execute(self.client.rpc('get_tables_info'))
             if response.data:
-                print(f"   📊 Available tables: {response.data}")
                 return response.data
             else:
-                print(f"   ❌ Could not retrieve table information")
+                logger.warning("Could not retrieve table information")
                 return []
                 
         except Exception as e:
-            print(f"   ❌ Error listing tables: {e}")
+            logger.error("Error listing tables: %s", e)
             return []
     
     async def check_table_structure(self, table_name: str = "documents"):
@@ -265,58 +420,167 @@ class SupabaseVectorStore:
         Check the structure of a specific table
         """
         if not self.client:
-            print("⚠️  Supabase client not initialized.")
+            logger.warning("Supabase client not initialized.")
             return None
         
         try:
-            print(f"\n🔍 Checking table structure for: {table_name}")
-            
             # Try to get one row to see the structure
-            response = self.client.table(table_name).select("*").limit(1).execute()
+            response = await self._execute(self.client.table(table_name).select("*").limit(1))
             
             if response.data:
-                print(f"   ✅ Table exists and has data")
-                print(f"   📊 Columns: {list(response.data[0].keys())}")
-                print(f"   📄 Sample data: {response.data[0]}")
                 return response.data[0]
             else:
-                print(f"   📭 Table exists but is empty")
+                logger.info("Table exists but is empty", extra={"table": table_name})
                 return None
                 
         except Exception as e:
-            print(f"   ❌ Error checking table structure: {e}")
+            logger.error("Error checking table structure: %s", e, extra={"table": table_name})
             return None
 
+    def _documents_changed(self, documents: List[Dict[str, Any]]):
+        """
+        Invalidate cached answers for the assistants whose documents changed
+        (everything when a document has no assistantId)
+        """
+        assistant_ids = {(doc.get("metadata") or {}).get("assistantId") for doc in documents}
+        if None in assistant_ids:
+            semantic_cache.invalidate()
+            return
+        for assistant_id in assistant_ids:
+            semantic_cache.invalidate(assistant_id)
+    
     async def insert_document(self, content: str, metadata: dict = None, table_name: str = "documents"):
         """
-        Insert a new document into the vector store
+        Insert a new document into the vector store (with its embedding, so match_documents can find it)
         """
         if not self.client:
-            print("⚠️  Supabase client not initialized.")
+            logger.warning("Supabase client not initialized.")
             return None
         
-        print(f"\n💾 Inserting document:")
-        print(f"   📋 Table: {table_name}")
-        print(f"   📝 Content: {content[:50]}...")
-        print(f"   🏷️  Metadata: {metadata}")
-        
         try:
-            data = {
-                "content": content,
-                "metadata": metadata or {}
-            }
-            response = self.client.table(table_name).insert(data).execute()
+            documents = [{"content": content, "metadata": metadata or {}}]
+            if Config.CHUNKING_ENABLED:
+                documents = [doc for _, doc in chunk_documents(documents)]
+            if not documents:
+                logger.warning("Empty document content, nothing inserted")
+                return None
+            
+            embeddings = await self.generate_embeddings([doc["content"] for doc in documents], cache_results=False)
+            # Como en _insert_batch: sin embedding, match_documents nunca encontraría el chunk
+            failed = sum(1 for embedding in embeddings if not embedding)
+            if failed:
+                logger.error("Embedding generation failed, document not inserted", extra={
+                    "table": table_name,
+                    "chunks": len(documents),
+                    "failed": failed
+                })
+                return None
+            rows = [{**doc, "embedding": embedding} for doc, embedding in zip(documents, embeddings)]
+            response = await self._execute(self.client.table(table_name).insert(rows))
             
             if response.data:
-                print(f"   ✅ Document inserted successfully")
+                self._documents_changed(rows)
+                logger.info("Document inserted", extra={"table": table_name, "chunks": len(rows)})
                 return response.data[0]
             else:
-                print(f"   ❌ No data returned from insert")
+                logger.error("No data returned from insert", extra={"table": table_name})
                 return None
                 
         except Exception as e:
-            print(f"   ❌ Error inserting document to Supabase: {e}")
+            logger.error("Error inserting document to Supabase: %s", e)
             return None
+    
+    async def _insert_batch(self, batch: List[Dict[str, Any]], offset: int, table_name: str, semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """
+        Embed one batch with a single embeddings call and bulk-insert it with a single PostgREST call
+        
+        Documents whose embedding failed are not inserted (match_documents could never
+        find them) and are reported as errors.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        async with semaphore:
+            embeddings = await self.generate_embeddings([doc["content"] for doc in batch], cache_results=False)
+            rows, positions = [], []
+            for i, (doc, embedding) in enumerate(zip(batch, embeddings)):
+                if not embedding:
+                    results[i] = {"index": offset + i, "status": "error", "error": "Embedding generation failed"}
+                    continue
+                rows.append({"content": doc["content"], "metadata": doc.get("metadata") or {}, "embedding": embedding})
+                positions.append(i)
+            if not rows:
+                return results
+            
+            try:
+                response = await self._execute(self.client.table(table_name).insert(rows))
+                inserted = response.data or []
+                if inserted:
+                    self._documents_changed(rows)
+            except Exception as e:
+                logger.error("Error bulk inserting batch: %s", e, extra={"offset": offset, "rows": len(rows)})
+                for i in positions:
+                    results[i] = {"index": offset + i, "status": "error", "error": str(e)}
+                return results
+        
+        for n, i in enumerate(positions):
+            if n < len(inserted):
+                results[i] = {"index": offset + i, "status": "created", "id": inserted[n].get("id")}
+            else:
+                results[i] = {"index": offset + i, "status": "error", "error": "No data returned from insert"}
+        return results
+    
+    async def insert_documents(self, documents: List[Dict[str, Any]], table_name: str = "documents") -> List[Dict[str, Any]]:
+        """
+        Batch ingestion: embed in batches of INGEST_BATCH_SIZE (one embeddings call each),
+        run up to INGEST_MAX_CONCURRENCY batches at once and bulk-insert each batch
+        
+        Returns one status dict per input document, in input order.
+        """
+        if not self.client:
+            logger.warning("Supabase client not initialized.")
+            return [
+                {"index": i, "status": "error", "error": "Supabase client not initialized"}
+                for i in range(len(documents))
+            ]
+        
+        logger.info("Batch inserting documents", extra={"table": table_name, "documents": len(documents)})
+        
+        # Chunking stage: (source_index, chunk) pairs; without chunking each document is its own chunk
+        if Config.CHUNKING_ENABLED:
+            chunked = chunk_documents(documents)
+        else:
+            chunked = list(enumerate(documents))
+        chunks = [doc for _, doc in chunked]
+        
+        batch_size = Config.INGEST_BATCH_SIZE
+        semaphore = asyncio.Semaphore(Config.INGEST_MAX_CONCURRENCY)
+        batch_results = await asyncio.gather(*[
+            self._insert_batch(chunks[offset:offset + batch_size], offset, table_name, semaphore)
+            for offset in range(0, len(chunks), batch_size)
+        ])
+        chunk_results = [result for batch in batch_results for result in batch]
+        
+        # Aggregate chunk results back to one status per input document
+        grouped: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(documents))}
+        for (source_index, _), result in zip(chunked, chunk_results):
+            grouped[source_index].append(result)
+        
+        results = []
+        for source_index, source_results in grouped.items():
+            errors = [r["error"] for r in source_results if r["status"] != "created"]
+            if not source_results:
+                results.append({"index": source_index, "status": "error", "error": "Empty content"})
+            elif errors:
+                results.append({"index": source_index, "status": "error", "error": errors[0], "chunks": len(source_results)})
+            else:
+                ids = [r.get("id") for r in source_results]
+                results.append({
+                    "index": source_index,
+                    "status": "created",
+                    "id": ids[0],
+                    "ids": ids,
+                    "chunks": len(source_results)
+                })
+        return results
 
 # Global instance
 vector_store = SupabaseVectorStore()
@@ -0,0 +1,66 @@
+import asyncio
+
+import bulk_import
+
+
+class FakeVectorStore:
+    """
+    insert_documents stub: documents whose content starts with "fail" come back as errors
+    """
+
+    async def insert_documents(self, documents):
+        return [
+            {"index": i, "status": "error" if doc["content"].startswith("fail") else "created"}
+            for i, doc in enumerate(documents)
+        ]
+
+
+async def records(contents):
+    for position, content in enumerate(contents, start=1):
+        yield position, {"content": content, "metadata": {}}
+
+
+def run_import(monkeypatch, contents):
+    monkeypatch.setattr(bulk_import, "vector_store", FakeVectorStore())
+    return asyncio.run(bulk_import.import_records(records(contents), batch_size=2, concurrency=1))
+
+
+def test_checkpoint_advances_over_created_batches(monkeypatch):
+    stats = run_import(monkeypatch, ["a", "b", "c", "d", "e", "f"])
+    assert stats["checkpoint"] == 6
+    assert stats["created"] == 6
+    assert stats["failed"] == 0
+
+
+def test_checkpoint_stops_before_batch_with_error_results(monkeypatch):
+    stats = run_import(monkeypatch, ["a", "b", "c", "fail-d", "e", "f"])
+    # Batch 1 (posiciones 3-4) tiene un error: el checkpoint se queda al final del batch 0
+    assert stats["checkpoint"] == 2
+    assert stats["created"] == 5
+    assert stats["failed"] == 1
+
+
+async def byte_chunks(data, size=4):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+def test_stream_reports_oversized_line_and_continues():
+    body = b'{"content": "a"}\n' + b"x" * 100 + b'\n{"content": "b"}\n'
+    items = asyncio.run(collect(bulk_import.iter_jsonl_stream(byte_chunks(body), max_line_bytes=40)))
+    assert [number for number, _ in items] == [1, 2, 3]
+    assert isinstance(items[1][1], ValueError)
+    assert [record["content"] for _, record in (items[0], items[2])] == ["a", "b"]
+
+
+def test_file_reports_oversized_line_and_continues(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_bytes(b'{"content": "a"}\n' + b"x" * 100 + b'\n{"content": "b"}\n')
+    items = asyncio.run(collect(bulk_import.iter_jsonl_file(str(path), max_line_bytes=40)))
+    assert isinstance(items[1][1], ValueError)
+    assert items[2][1]["content"] == "b"
+    assert items[-1][0] == path.stat().st_size
@@ -0,0 +1,27 @@
+import asyncio
+import sqlite3
+
+from embedding_cache import EmbeddingCache
+
+
+def test_reopens_after_close(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"))
+    cache.close()
+    cache.open()
+    asyncio.run(cache.set("hola", "model", [0.5, 1.0]))
+    assert cache.stats()["persistent"]
+
+    restarted = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"))
+    assert asyncio.run(restarted.get("Hola ", "model")) == [0.5, 1.0]
+    assert restarted.disk_hits == 1
+
+
+def test_expired_rows_are_purged_on_open(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path=path)
+    asyncio.run(cache.set("hola", "model", [0.5]))
+    cache.close()
+
+    expired = EmbeddingCache(path=path, ttl_seconds=-1)
+    assert expired.purged == 1
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 0
@@ -0,0 +1,115 @@
+import asyncio
+
+from history_compactor import HistoryCompactor, split_turns
+
+
+def tool_round(call_id, output):
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "search", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "content": output}
+    ]
+
+
+def turn(n, words=50):
+    return [
+        {"role": "user", "content": f"pregunta {n} " + "palabra " * words},
+        {"role": "assistant", "content": f"respuesta {n} " + "palabra " * words}
+    ]
+
+
+class RecordingCompactor(HistoryCompactor):
+    """
+    Summaries without the LLM: records which messages each summary call received
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(summarize=False, **kwargs)
+        self.calls = []
+
+    async def _generate_summary(self, previous, messages):
+        self.calls.append((previous, len(messages)))
+        return f"resumen de {len(messages)} mensajes"
+
+
+def test_split_turns_keeps_system_prefix_and_tool_rounds():
+    messages = [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "hola"},
+        *tool_round("c1", "resultado"),
+        {"role": "assistant", "content": "respuesta"},
+        {"role": "user", "content": "otra"}
+    ]
+    system, turns = split_turns(messages)
+    assert system == messages[:1]
+    assert [len(t) for t in turns] == [4, 1]
+    assert turns[0][1]["tool_calls"] and turns[0][2]["role"] == "tool"
+
+
+def test_split_turns_without_leading_user():
+    system, turns = split_turns([{"role": "assistant", "content": "hola"}, {"role": "user", "content": "q"}])
+    assert system == []
+    assert [len(t) for t in turns] == [1, 1]
+
+
+def test_compact_under_budget_returns_input():
+    compactor = HistoryCompactor(token_budget=10_000, summarize=False)
+    messages = turn(1)
+    assert asyncio.run(compactor.compact(messages)) is messages
+
+
+def test_compact_truncates_only_consumed_tool_outputs():
+    compactor = HistoryCompactor(token_budget=50, keep_turns=10, tool_output_max_tokens=5, summarize=False)
+    big = "dato " * 100
+    messages = [
+        {"role": "user", "content": "q1"},
+        *tool_round("c1", big),
+        {"role": "assistant", "content": "respuesta 1"},
+        {"role": "user", "content": "q2"},
+        *tool_round("c2", big)
+    ]
+    compacted = asyncio.run(compactor.compact(messages))
+    # c1 ya tiene respuesta del assistant; c2 todavía no la ha leído el modelo
+    assert "tool output truncated" in compacted[2]["content"]
+    assert compacted[6]["content"] == big
+    assert messages[2]["content"] == big
+
+
+def test_consumed_tool_preview_is_stable_across_rounds():
+    compactor = HistoryCompactor(token_budget=50, keep_turns=10, tool_output_max_tokens=5, summarize=False)
+    big = "dato " * 100
+    first = [
+        {"role": "user", "content": "q1"},
+        *tool_round("c1", big),
+        {"role": "assistant", "content": "respuesta 1"},
+        {"role": "user", "content": "q2"}
+    ]
+    later = first + [*tool_round("c2", big), *tool_round("c3", big)]
+    before = asyncio.run(compactor.compact(first))
+    after = asyncio.run(compactor.compact(later))
+    assert after[:len(before)] == before
+
+
+def test_compact_summarizes_older_turns():
+    compactor = RecordingCompactor(token_budget=200, keep_turns=2)
+    messages = [{"role": "system", "content": "sys"}] + [m for n in range(6) for m in turn(n)]
+    compacted = asyncio.run(compactor.compact(messages))
+    assert compacted[0] == messages[0]
+    assert compacted[1]["role"] == "system" and "resumen de 8 mensajes" in compacted[1]["content"]
+    assert compacted[2:] == messages[-4:]
+    assert compactor.calls == [(None, 8)]
+
+
+def test_summary_prefix_cache_extends_incrementally():
+    compactor = RecordingCompactor(token_budget=200, keep_turns=2)
+    history = [m for n in range(6) for m in turn(n)]
+    asyncio.run(compactor.compact(history))
+    # Mismo prefijo: hit exacto, sin nueva llamada
+    asyncio.run(compactor.compact(history))
+    assert compactor.calls == [(None, 8)]
+    assert compactor.summary_cache_hits == 1
+
+    # Dos turnos más: solo se resumen los mensajes nuevos, sobre el resumen anterior
+    asyncio.run(compactor.compact(history + turn(6) + turn(7)))
+    assert compactor.calls == [(None, 8), ("resumen de 8 mensajes", 4)]
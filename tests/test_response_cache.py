@@ -0,0 +1,63 @@
+import asyncio
+
+import response_cache
+from response_cache import MemoryLRUBackend, ResponseCache, canonical_key
+
+
+def payload(**overrides):
+    return {"model": "m", "messages": [{"role": "user", "content": "hola"}], "temperature": 0, **overrides}
+
+
+def test_canonical_key_ignores_key_order():
+    a = {"model": "m", "temperature": 0, "messages": [{"role": "user", "content": "hola"}]}
+    b = {"messages": [{"content": "hola", "role": "user"}], "temperature": 0, "model": "m"}
+    assert canonical_key(a) == canonical_key(b)
+    assert canonical_key(a) != canonical_key({**a, "temperature": 0.1})
+    assert canonical_key(a).startswith("llm:")
+
+
+def test_memory_backend_ttl(monkeypatch):
+    backend = MemoryLRUBackend()
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    asyncio.run(backend.set("k", "v", ttl_seconds=10))
+    assert asyncio.run(backend.get("k")) == "v"
+    now[0] += 11
+    assert asyncio.run(backend.get("k")) is None
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryLRUBackend(max_entries=2)
+
+    async def run():
+        await backend.set("a", "1", 60)
+        await backend.set("b", "2", 60)
+        await backend.get("a")
+        await backend.set("c", "3", 60)
+        return [await backend.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == ["1", None, "3"]
+
+
+def test_only_low_temperature_non_streaming_payloads_are_cacheable():
+    cache = ResponseCache(MemoryLRUBackend(), max_temperature=0.3)
+    assert cache.is_cacheable(payload(temperature=0.3))
+    assert not cache.is_cacheable(payload(temperature=0.7))
+    assert not cache.is_cacheable(payload(stream=True))
+    # Sin temperature explícita cuenta como 1.0 (valor por defecto de la API)
+    assert not cache.is_cacheable({"model": "m", "messages": []})
+    assert not ResponseCache(MemoryLRUBackend(), enabled=False).is_cacheable(payload())
+
+
+def test_round_trip_skips_errors_and_counts_hits():
+    cache = ResponseCache(MemoryLRUBackend())
+
+    async def run():
+        await cache.set(payload(), {"content": "x", "finish_reason": "error"})
+        miss = await cache.get(payload())
+        await cache.set(payload(), {"content": "ok", "finish_reason": "stop"})
+        await cache.set(payload(temperature=0.7), {"content": "hot", "finish_reason": "stop"})
+        return miss, await cache.get(payload()), await cache.get(payload(temperature=0.7))
+
+    assert asyncio.run(run()) == (None, {"content": "ok", "finish_reason": "stop"}, None)
+    assert (cache.hits, cache.misses) == (1, 1)
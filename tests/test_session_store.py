@@ -0,0 +1,35 @@
+import asyncio
+
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+async def lifespan_cycles(store):
+    # Startup → request → shutdown, dos veces (ej: reload o TestClient por test)
+    for n in range(2):
+        await store.evict_expired()
+        await store.append("s1", [{"role": "user", "content": f"hola {n}"}])
+        await store.close()
+    await store.evict_expired()
+    return await store.load("s1")
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    messages = asyncio.run(lifespan_cycles(store))
+    assert [m["content"] for m in messages] == ["hola 0", "hola 1"]
+
+
+def test_sqlite_store_evicts_expired(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl_seconds=-1)
+
+    async def run():
+        await store.append("s1", [{"role": "user", "content": "hola"}])
+        expired = await store.evict_expired()
+        return expired, await store.load("s1")
+
+    assert asyncio.run(run()) == (1, [])
+
+
+def test_memory_store_lifespan_cycles():
+    messages = asyncio.run(lifespan_cycles(MemorySessionStore()))
+    assert [m["content"] for m in messages] == ["hola 0", "hola 1"]
@@ -4,17 +4,18 @@ Tools module - Contiene todas las herramientas/funciones disponibles para el LLM
 Para agregar una nueva tool:
 1. Crea un archivo nuevo en esta carpeta (ej: mi_tool.py)
 2. Implementa una función async que reciba arguments: Dict[str, Any]
-3. Importa y agrega la función a TOOL_FUNCTIONS
-4. Listo! La tool estará disponible automáticamente
+   (más los valores de contexto que declare en ``requires``, ej: assistant_id)
+3. Declara su ``TOOL = ToolSpec(...)`` con schema, timeout, concurrencia y cache
+4. Regístrala en TOOL_REGISTRY
+5. Listo! El servidor inyecta su schema y la ejecuta con sus límites
 """
 
-from .weather_tool import get_current_weather
+from .registry import ToolRegistry, ToolSpec
+from .weather_tool import get_current_weather, TOOL as WEATHER_TOOL
+from .vector_store_tool import search_vector_store, TOOL as VECTOR_STORE_TOOL
 
-# Mapeo de nombres de tools a funciones
-TOOL_FUNCTIONS = {
-    "get_current_weather": get_current_weather,
-    # search_vector_store se maneja aparte en main.py porque necesita assistant_id
-}
-
-__all__ = ["TOOL_FUNCTIONS", "get_current_weather"]
+TOOL_REGISTRY = ToolRegistry()
+TOOL_REGISTRY.register(WEATHER_TOOL)
+TOOL_REGISTRY.register(VECTOR_STORE_TOOL)
 
+__all__ = ["TOOL_REGISTRY", "ToolRegistry", "ToolSpec", "get_current_weather", "search_vector_store"]
@@ -0,0 +1,62 @@
+"""
+Cache de resultados de tools
+
+Cada tool declara su ``ToolCachePolicy`` (TTL y argumentos que forman la clave).
+``execute_tool`` consulta primero la memo del request (tool calls repetidos en el
+mismo loop de auto-tools) y después la cache global con TTL.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional, Sequence
+
+from config import Config
+from response_cache import MemoryLRUBackend
+
+
+def normalize_argument(value: Any) -> Any:
+    """
+    Normaliza strings (minúsculas, espacios colapsados) para que "Barcelona " y "barcelona" compartan clave
+    """
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return value
+
+
+class ToolCachePolicy:
+    def __init__(self, ttl_seconds: float, key_args: Sequence[str], per_assistant: bool = False, normalize: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.key_args = tuple(key_args)
+        self.per_assistant = per_assistant
+        self.normalize = normalize  # normalize_argument() sobre los key_args
+
+
+def tool_cache_key(tool_name: str, arguments: Dict[str, Any], policy: Optional[ToolCachePolicy] = None, assistant_id: str = None) -> str:
+    """
+    Clave de cache: nombre de la tool + argumentos declarados (o todos si no hay policy)
+    
+    Los argumentos van tal cual; solo se normalizan si la policy lo pide (``normalize=True``).
+    """
+    if policy is not None:
+        key_args = {name: arguments.get(name) for name in policy.key_args}
+        if policy.normalize:
+            key_args = {name: normalize_argument(value) for name, value in key_args.items()}
+        if policy.per_assistant:
+            key_args["__assistant_id__"] = assistant_id
+    else:
+        key_args = dict(arguments)
+        key_args["__assistant_id__"] = assistant_id
+    canonical = json.dumps(key_args, sort_keys=True, ensure_ascii=False, default=str)
+    return f"tool:{tool_name}:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_error_result(result: str) -> bool:
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and "error" in data
+
+
+# Cache global de resultados (compartida entre requests)
+tool_result_cache = MemoryLRUBackend(max_entries=Config.TOOL_CACHE_MAX_ENTRIES)
@@ -0,0 +1,88 @@
+"""
+Registro declarativo de tools
+
+Cada tool declara un ``ToolSpec`` con su JSON schema, timeout, concurrencia
+máxima, política de cache y el contexto del request que necesita (por ejemplo
+``assistant_id``). El servidor inyecta los schemas registrados en las llamadas
+al LLM y el executor aplica los límites de cada tool.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .cache import ToolCachePolicy
+
+
+class ToolSpec:
+    def __init__(
+        self,
+        name: str,
+        function: Callable[..., Awaitable[str]],
+        description: str,
+        parameters: Dict[str, Any],
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[ToolCachePolicy] = None,
+        requires: Sequence[str] = ()
+    ):
+        self.name = name
+        self.function = function
+        self.description = description
+        self.parameters = parameters
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.requires = tuple(requires)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        """
+        Límite global (entre requests) de ejecuciones concurrentes de esta tool
+        """
+        if self.max_concurrency and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def schema(self) -> Dict[str, Any]:
+        """
+        Definición en formato OpenAI / OpenRouter ``tools``
+        """
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters
+            }
+        }
+
+    async def __call__(self, arguments: Dict[str, Any], context: Dict[str, Any]) -> str:
+        kwargs = {name: context.get(name) for name in self.requires}
+        return await self.function(arguments, **kwargs)
+
+
+class ToolRegistry:
+    def __init__(self):
+        self._tools: Dict[str, ToolSpec] = {}
+
+    def register(self, spec: ToolSpec) -> ToolSpec:
+        self._tools[spec.name] = spec
+        return spec
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._tools.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def schemas(self, names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Schemas de las tools pedidas (todas si ``names`` es None); ignora nombres desconocidos
+        """
+        names = self.names if names is None else names
+        return [self._tools[name].schema() for name in names if name in self._tools]
@@ -0,0 +1,98 @@
+"""
+Runtime compartido por las tools que hacen llamadas HTTP
+
+Un único ``httpx.AsyncClient`` con pool de conexiones (keep-alive) abierto y
+cerrado con el lifespan de la app, límite de conexiones concurrentes por host y
+política de timeout / reintentos declarada por cada tool.
+"""
+
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import Config
+
+
+# Métodos que se pueden repetir sin efectos duplicados
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class ToolHttpPolicy:
+    def __init__(self, timeout: float = 10.0, retries: int = 0, backoff: float = 0.2, retry_unsafe: bool = False):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_unsafe = retry_unsafe  # reintentar también POST/PATCH (solo si la tool es idempotente)
+
+
+class ToolRuntime:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=Config.TOOL_HTTP_HTTP2,
+            timeout=httpx.Timeout(Config.TOOL_HTTP_TIMEOUT, connect=Config.TOOL_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=Config.TOOL_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.TOOL_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.TOOL_HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Cliente compartido; se crea bajo demanda para que los scripts fuera del lifespan funcionen
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self):
+        _ = self.client
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(Config.TOOL_HTTP_MAX_PER_HOST)
+        return self._host_semaphores[host]
+
+    async def request(self, method: str, url: str, policy: ToolHttpPolicy = None, **kwargs) -> httpx.Response:
+        """
+        Petición HTTP con el timeout y los reintentos de la tool
+
+        Se reintenta ante errores de red y respuestas 5xx/429, con backoff exponencial,
+        solo en métodos idempotentes (o con ``retry_unsafe``): un POST podría ejecutarse dos veces.
+        El slot del host solo se ocupa durante cada intento, no durante el backoff.
+        """
+        policy = policy or ToolHttpPolicy()
+        semaphore = self._host_semaphore(url)
+        retries = policy.retries if method.upper() in IDEMPOTENT_METHODS or policy.retry_unsafe else 0
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    response = await self.client.request(method, url, timeout=policy.timeout, **kwargs)
+                if response.status_code < 500 and response.status_code != 429:
+                    return response
+                if attempt == retries:
+                    return response
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            await asyncio.sleep(policy.backoff * (2 ** attempt))
+
+    async def get(self, url: str, policy: ToolHttpPolicy = None, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, policy, **kwargs)
+
+
+# Global instance
+tool_runtime = ToolRuntime()
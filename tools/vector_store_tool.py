@@ -1,6 +1,9 @@
 import json
 from typing import Dict, Any
+from config import Config
 from supabase_client import vector_store
+from .cache import ToolCachePolicy
+from .registry import ToolSpec
 
 
 async def search_vector_store(arguments: Dict[str, Any], assistant_id: str = None) -> str:
@@ -8,7 +11,8 @@ async def search_vector_store(arguments: Dict[str, Any], assistant_id: str = Non
     Busca en el vector store documentos similares a una consulta
     
     Args:
-        arguments: Dict con 'query' (str) y 'limit' (int) opcional
+        arguments: Dict con 'query' (str), 'limit' (int) opcional y
+            'mode' (str) opcional: "fallback" (por defecto) o "hybrid"
         assistant_id: ID del asistente para filtrar resultados
         
     Returns:
@@ -16,13 +20,52 @@ async def search_vector_store(arguments: Dict[str, Any], assistant_id: str = Non
     """
     query = arguments.get("query", "")
     limit = arguments.get("limit", 5)
+    mode = arguments.get("mode", "fallback")
+    if mode not in ("fallback", "hybrid"):
+        mode = "fallback"
     # Usar el assistant_id del request, no del LLM
     search_assistant_id = assistant_id or arguments.get("assistant_id", "")
     
     results = await vector_store.search_similar(
         query=query,
         limit=limit,
-        assistant_id=search_assistant_id
+        assistant_id=search_assistant_id,
+        mode=mode
     )
     return json.dumps(results)
 
+
+TOOL = ToolSpec(
+    name="search_vector_store",
+    function=search_vector_store,
+    description="Busca en la base de conocimiento documentos relevantes para una consulta",
+    parameters={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Texto a buscar"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Número máximo de documentos (por defecto 5)"
+            },
+            "mode": {
+                "type": "string",
+                "enum": ["fallback", "hybrid"],
+                "description": "fallback: vectorial y luego léxica; hybrid: ambas combinadas"
+            }
+        },
+        "required": ["query"]
+    },
+    timeout=10.0,
+    max_concurrency=20,
+    # Misma consulta del mismo assistant → mismos documentos durante un rato
+    cache=ToolCachePolicy(
+        ttl_seconds=Config.VECTOR_SEARCH_CACHE_TTL,
+        key_args=["query", "limit", "mode"],
+        per_assistant=True
+    ),
+    # El assistant_id viene del request, no del LLM
+    requires=["assistant_id"]
+)
@@ -1,7 +1,13 @@
 import json
-import httpx
 from typing import Dict, Any
 from config import Config
+from .cache import ToolCachePolicy
+from .registry import ToolSpec
+from .runtime import ToolHttpPolicy, tool_runtime
+
+
+# Timeout corto y un reintento: WeatherAPI suele responder en < 1s
+HTTP_POLICY = ToolHttpPolicy(timeout=5.0, retries=1)
 
 
 async def get_current_weather(arguments: Dict[str, Any]) -> str:
@@ -27,37 +33,56 @@ async def get_current_weather(arguments: Dict[str, Any]) -> str:
         })
     
     try:
-        # Llamada real a WeatherAPI.com
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "http://api.weatherapi.com/v1/current.json",
-                params={
-                    "key": Config.WEATHER_API_KEY,
-                    "q": location,
-                    "aqi": "no"
-                },
-                timeout=10.0
-            )
+        # Llamada real a WeatherAPI.com (cliente compartido del runtime de tools)
+        response = await tool_runtime.get(
+            f"{Config.WEATHER_API_BASE_URL}/v1/current.json",
+            HTTP_POLICY,
+            params={
+                "key": Config.WEATHER_API_KEY,
+                "q": location,
+                "aqi": "no"
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return json.dumps({
+                "location": f"{data['location']['name']}, {data['location']['country']}",
+                "temperature": f"{data['current']['temp_c']}°C",
+                "condition": data['current']['condition']['text'],
+                "humidity": f"{data['current']['humidity']}%",
+                "wind_kph": data['current']['wind_kph'],
+                "feels_like": f"{data['current']['feelslike_c']}°C"
+            })
+        else:
+            return json.dumps({
+                "error": f"Weather API error: {response.status_code}",
+                "location": location
+            })
             
-            if response.status_code == 200:
-                data = response.json()
-                return json.dumps({
-                    "location": f"{data['location']['name']}, {data['location']['country']}",
-                    "temperature": f"{data['current']['temp_c']}°C",
-                    "condition": data['current']['condition']['text'],
-                    "humidity": f"{data['current']['humidity']}%",
-                    "wind_kph": data['current']['wind_kph'],
-                    "feels_like": f"{data['current']['feelslike_c']}°C"
-                })
-            else:
-                return json.dumps({
-                    "error": f"Weather API error: {response.status_code}",
-                    "location": location
-                })
-                
     except Exception as e:
         return json.dumps({
             "error": f"Failed to fetch weather: {str(e)}",
             "location": location
         })
 
+
+TOOL = ToolSpec(
+    name="get_current_weather",
+    function=get_current_weather,
+    description="Obtiene el clima actual de una ubicación específica",
+    parameters={
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": "La ciudad y país, por ejemplo: Barcelona, España"
+            }
+        },
+        "required": ["location"]
+    },
+    timeout=12.0,
+    max_concurrency=10,
+    # El clima cambia poco: 10 minutos por ubicación normalizada
+    cache=ToolCachePolicy(ttl_seconds=Config.WEATHER_CACHE_TTL, key_args=["location"], normalize=True)
+)
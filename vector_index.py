@@ -0,0 +1,105 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # HNSW es opcional: sin hnswlib se usa búsqueda brute-force
+    hnswlib = None
+
+
+def parse_embedding(value: Any) -> Optional[List[float]]:
+    """
+    pgvector columns come back from PostgREST as strings like "[0.1,0.2,...]"
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+class LocalVectorIndex:
+    """
+    In-process mirror of one assistant's rows of the documents table
+
+    Rows are kept in a normalized float32 matrix so top-k cosine similarity is a
+    single matrix-vector product. With ``use_hnsw`` (and hnswlib installed) an
+    HNSW graph answers queries instead of the brute-force scan.
+
+    ``search`` runs in a worker thread while ``add`` runs on the event loop; a lock
+    serializes them (hnswlib can't add or resize during a concurrent query).
+    """
+
+    def __init__(self, assistant_id: str, use_hnsw: bool = False):
+        self.assistant_id = assistant_id
+        self.documents: List[Dict[str, Any]] = []
+        self.matrix: Optional[np.ndarray] = None
+        self.last_id: Any = None
+        self.use_hnsw = use_hnsw and hnswlib is not None
+        self._hnsw = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, rows: List[Dict[str, Any]]):
+        """
+        Append rows (with an ``embedding`` column) to the index
+        """
+        documents, vectors = [], []
+        for row in rows:
+            if row.get("id") is not None:
+                self.last_id = row["id"] if self.last_id is None else max(self.last_id, row["id"])
+            embedding = parse_embedding(row.get("embedding"))
+            if not embedding:
+                continue
+            documents.append({key: value for key, value in row.items() if key != "embedding"})
+            vectors.append(embedding)
+        if not vectors:
+            return
+
+        block = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            start = len(self.documents)
+            self.documents.extend(documents)
+            self.matrix = block if self.matrix is None else np.vstack([self.matrix, block])
+
+            if self.use_hnsw:
+                if self._hnsw is None:
+                    self._hnsw = hnswlib.Index(space="ip", dim=block.shape[1])
+                    self._hnsw.init_index(max_elements=max(len(self.documents) * 2, 1024), ef_construction=200, M=16)
+                elif len(self.documents) > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(len(self.documents) * 2)
+                self._hnsw.add_items(block, np.arange(start, len(self.documents)))
+
+    def search(self, query_embedding: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Top-k by cosine similarity; same row shape as the match_documents RPC
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+
+        with self._lock:
+            if self.matrix is None or not len(self.documents):
+                return []
+            k = min(limit, len(self.documents))
+
+            if self._hnsw is not None:
+                self._hnsw.set_ef(max(k * 4, 50))
+                labels, distances = self._hnsw.knn_query(query, k=k)
+                hits = [(int(i), 1.0 - float(d)) for i, d in zip(labels[0], distances[0])]
+            else:
+                scores = self.matrix @ query
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                hits = [(int(i), float(scores[i])) for i in top]
+
+            return [{**self.documents[i], "similarity": similarity} for i, similarity in hits]